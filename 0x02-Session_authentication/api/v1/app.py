@@ -3,9 +3,11 @@
 Route module for the API
 """
 from os import getenv
+from api.v1.metrics import REQUEST_SECONDS, STAGE_SECONDS
 from api.v1.views import app_views
-from flask import Flask, jsonify, abort, request
+from flask import Flask, jsonify, abort, request, g
 from flask_cors import (CORS, cross_origin)
+from time import perf_counter
 import os
 
 
@@ -30,36 +32,71 @@ elif AUTH_TYPE == "session_db_auth":
     from api.v1.auth.session_db_auth import SessionDBAuth
     auth = SessionDBAuth()
 
+# Paths that don't require authentication, extended with the
+# comma-separated AUTH_EXCLUDED_PATHS ('*' suffix for a prefix)
+excluded_paths = [
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/auth_session/login/',
+]
+excluded_paths.extend(exc_path.strip() for exc_path
+                      in getenv("AUTH_EXCLUDED_PATHS", "").split(",")
+                      if exc_path.strip())
+
+
+def resolve_current_user():
+    """ Resolve the authenticated user once per request.
+    The user is memoized on flask.g (g.current_user) together with the
+    time spent resolving it (g.auth_time, in seconds).
+    """
+    if 'current_user' not in g:
+        start = perf_counter()
+        g.current_user = auth.current_user(request) if auth else None
+        g.auth_time = perf_counter() - start
+        STAGE_SECONDS.observe(g.auth_time, "current_user")
+    return g.current_user
+
 
 @app.before_request
 def before_request():
     """ Method to handle requests before each request """
+    g.request_start = start = perf_counter()
     if auth is None:
         return
 
-    # Paths that don't require authentication
-    excluded_paths = [
-        '/api/v1/status/',
-        '/api/v1/unauthorized/',
-        '/api/v1/forbidden/',
-        '/api/v1/auth_session/login/',
-    ]
-
     # Check if the path requires authentication
-    if not auth.require_auth(request.path, excluded_paths):
+    required = auth.require_auth(request.path, excluded_paths)
+    now = perf_counter()
+    STAGE_SECONDS.observe(now - start, "require_auth")
+    if not required:
         return
 
     # Check for authorization header or session cookie
     cookie = auth.session_cookie(request)
-    if auth.authorization_header(request) is None and cookie is None:
+    header = auth.authorization_header(request)
+    STAGE_SECONDS.observe(perf_counter() - now, "credentials")
+    if header is None and cookie is None:
         abort(401)
 
-    request.current_user = auth.current_user(request)
+    request.current_user = resolve_current_user()
     # Check for current user
-    if auth.current_user(request) is None:
+    if request.current_user is None:
         abort(403)
 
 
+@app.after_request
+def after_request(response):
+    """ Record the latency of the request under its route """
+    start = g.get('request_start')
+    if start is not None:
+        rule = request.url_rule
+        REQUEST_SECONDS.observe(perf_counter() - start, request.method,
+                                rule.rule if rule else "unmatched",
+                                str(response.status_code))
+    return response
+
+
 @app.errorhandler(401)
 def unauthorized(error) -> str:
     """ Request unauthorized handler
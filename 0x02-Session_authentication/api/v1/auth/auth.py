@@ -4,6 +4,7 @@
 from flask import request
 from typing import List, TypeVar
 from os import getenv
+from api.v1.auth.path_matcher import PathMatcher
 
 
 class Auth:
@@ -20,23 +21,22 @@ class Auth:
 
         Returns:
             True if authentication is required, False otherwise.
+
+        excluded_paths is compiled into a PathMatcher the first time it
+        is seen, and again only when a list with other paths is passed.
         """
         if path is None:
             return True
         if not excluded_paths:
             return True
 
-        normalized_path = path.rstrip('/')
-
-        for exc_path in excluded_paths:
-            # Handle wildcard (*) at the end of the excluded path
-            if exc_path.endswith('*'):
-                if normalized_path.startswith(exc_path.rstrip('*')):
-                    return False
-            elif exc_path.rstrip('/') == normalized_path:
-                return False
+        if getattr(self, '_excluded_paths', None) is not excluded_paths:
+            matcher = getattr(self, '_path_matcher', None)
+            if matcher is None or matcher.source != excluded_paths:
+                self._path_matcher = PathMatcher(excluded_paths)
+            self._excluded_paths = excluded_paths
 
-        return True
+        return not self._path_matcher.match(path)
 
     def authorization_header(self, request=None) -> str:
         """
@@ -2,8 +2,12 @@
 """ Basic Authentication Module.
 """
 from api.v1.auth.auth import Auth
+from api.v1.auth.credential_cache import CredentialCache
+from api.v1.metrics import STAGE_SECONDS
 import base64
+from models.env import env_float, env_int
 from models.user import User
+from time import perf_counter
 from typing import TypeVar
 
 UserType = TypeVar('User')
@@ -12,8 +16,18 @@ UserType = TypeVar('User')
 class BasicAuth(Auth):
     """ Inherits fro Auth class and
     performes a Basic Authentication.
+
+    Verified headers are cached (BASIC_AUTH_CACHE_SIZE entries, for
+    BASIC_AUTH_CACHE_TTL seconds) so a client reusing the same header
+    skips the decode, the user lookup and the password hash.
     """
 
+    def __init__(self):
+        """ Initialize the verified-credential cache. """
+        self.credential_cache = CredentialCache(
+            env_int('BASIC_AUTH_CACHE_SIZE', 1024),
+            env_float('BASIC_AUTH_CACHE_TTL', 30))
+
     def extract_base64_authorization_header(self,
                                             authorization_header: str) -> str:
         """
@@ -86,13 +100,20 @@ class BasicAuth(Auth):
             return None
 
         try:
+            start = perf_counter()
             users = User.search({"email": user_email})
+            now = perf_counter()
+            STAGE_SECONDS.observe(now - start, "user_lookup")
             if not users:
                 return None
 
-            for user in users:
-                if user.is_valid_password(user_pwd):
-                    return user
+            try:
+                for user in users:
+                    if user.is_valid_password(user_pwd):
+                        return user
+            finally:
+                STAGE_SECONDS.observe(perf_counter() - now,
+                                      "password_check")
 
             return None  # No matching password
         except Exception:
@@ -107,21 +128,29 @@ class BasicAuth(Auth):
         if auth_header is None:
             return None
 
+        # Reuse a previous verification of the same header
+        start = perf_counter()
+        cache_key = self.credential_cache.key(auth_header)
+        user = self.credential_cache.get(cache_key)
+        STAGE_SECONDS.observe(perf_counter() - start, "credential_cache")
+        if user is not None:
+            return user
+
         # Extract the Base64 part from the Authorization header
+        start = perf_counter()
         base64_auth = self.extract_base64_authorization_header(auth_header)
-        if base64_auth is None:
-            return None
 
         # Decode the Base64 string
         decoded_auth = self.decode_base64_authorization_header(base64_auth)
-        if decoded_auth is None:
-            return None
 
         # Extract user email and pswd from the decoded string
         user_email, user_pwd = self.extract_user_credentials(decoded_auth)
+        STAGE_SECONDS.observe(perf_counter() - start, "decode_header")
         if user_email is None or user_pwd is None:
             return None
 
         # Retrieve the User object from email and pswd
         user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            self.credential_cache.put(cache_key, user)
         return user
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+""" Verified-credential cache module.
+"""
+import hashlib
+import hmac
+import os
+import time
+from typing import TypeVar
+from models.lru import LRUCache
+from models.user import User
+
+
+class CredentialCache:
+    """ Bounded LRU of Authorization headers already verified.
+
+    Keys are an HMAC of the raw header under a random per-process key,
+    so clear credentials are never kept in memory. Each entry keeps the
+    user ID, the email and password hash it was verified against, and
+    an expiration time; it is dropped as soon as the user is removed or
+    either of those changes.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 30):
+        """ Initialize an empty cache """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.__key = os.urandom(32)
+        self.__entries = LRUCache(max_size)
+
+    def key(self, authorization_header: str) -> bytes:
+        """ Keyed hash of a raw Authorization header """
+        return hmac.new(self.__key, authorization_header.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def get(self, key: bytes) -> TypeVar('User'):
+        """ Return the User verified for key, or None """
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+        user_id, email, password, expires = entry
+        if time.monotonic() > expires:
+            self.__entries.discard(key)
+            return None
+        user = User.get(user_id)
+        if user is None or user.email != email or user.password != password:
+            self.discard(key)
+            return None
+        return user
+
+    def put(self, key: bytes, user: TypeVar('User')):
+        """ Remember that key was verified for user """
+        self.__entries.put(key, (user.id, user.email, user.password,
+                                 time.monotonic() + self.ttl))
+
+    def discard(self, key: bytes):
+        """ Forget key """
+        self.__entries.discard(key)
+
+    def clear(self):
+        """ Forget every entry """
+        self.__entries.clear()
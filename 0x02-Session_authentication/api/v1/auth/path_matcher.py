@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+""" Path matcher module.
+"""
+from typing import List
+
+
+class PathMatcher:
+    """ Excluded paths compiled into an exact-match set and a prefix trie.
+
+    A path ending with '*' matches every path starting with what comes
+    before the '*'; any other path matches itself, with or without a
+    trailing '/'. Matching costs O(len(path)) whatever the number of
+    excluded paths.
+    """
+    END = ''
+
+    def __init__(self, excluded_paths: List[str]):
+        """ Compile excluded_paths """
+        self.source = list(excluded_paths)
+        self.exact = set()
+        self.trie = {}
+        for exc_path in excluded_paths:
+            if exc_path.endswith('*'):
+                node = self.trie
+                for char in exc_path.rstrip('*'):
+                    node = node.setdefault(char, {})
+                node[self.END] = True
+            else:
+                self.exact.add(exc_path.rstrip('/'))
+
+    def match(self, path: str) -> bool:
+        """ Return True if path is excluded """
+        normalized_path = path.rstrip('/')
+        if normalized_path in self.exact:
+            return True
+        node = self.trie
+        if self.END in node:
+            return True
+        for char in normalized_path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self.END in node:
+                return True
+        return False
@@ -2,14 +2,30 @@
 """ Session Authentication Module.
 """
 from .auth import Auth
+from .session_store import session_store
+from api.v1.metrics import STAGE_SECONDS
 import uuid
+from datetime import datetime
+from time import perf_counter
 from typing import TypeVar
 from models.user import User
 
 
 class SessionAuth(Auth):
-    """ Session Authentication mechanism."""
+    """ Session Authentication mechanism.
+
+    Sessions live in a session store (see SESSION_STORE); the default
+    in-memory store is backed by `user_id_by_session_id`, which maps
+    session IDs to user IDs unless `session_records` is set (then to
+    {"user_id", "created_at"} dictionaries).
+    """
     user_id_by_session_id = {}
+    session_records = False
+
+    def __init__(self):
+        """Initialize the session store."""
+        self.session_store = session_store(self.user_id_by_session_id,
+                                           not self.session_records)
 
     def create_session(self, user_id: str = None) -> str:
         """Create a session ID for a given user ID.
@@ -19,7 +35,7 @@ class SessionAuth(Auth):
             return None
 
         session_id = str(uuid.uuid4())
-        self.user_id_by_session_id[session_id] = user_id
+        self.session_store.set(session_id, user_id, datetime.now())
         return session_id
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
@@ -28,7 +44,10 @@ class SessionAuth(Auth):
         """
         if session_id is None or not isinstance(session_id, str):
             return None
-        return self.user_id_by_session_id.get(session_id)
+        record = self.session_store.get(session_id)
+        if record is None:
+            return None
+        return record.get("user_id")
 
     def current_user(self, request=None):
         """ Returns the current User instance based on the session cookie """
@@ -38,8 +57,13 @@ class SessionAuth(Auth):
         session_id = self.session_cookie(request)
         if session_id is None:
             return None
+        start = perf_counter()
         user_id = self.user_id_for_session_id(session_id)
-        return User.get(user_id)
+        now = perf_counter()
+        STAGE_SECONDS.observe(now - start, "session_lookup")
+        user = User.get(user_id)
+        STAGE_SECONDS.observe(perf_counter() - now, "user_lookup")
+        return user
 
     def destroy_session(self, request=None):
         """ Deleted the user session/logout. """
@@ -54,7 +78,4 @@ class SessionAuth(Auth):
         if user_id is None:
             return False
 
-        if session_id in self.user_id_by_session_id:
-            del self.user_id_by_session_id[session_id]
-            return True
-        return False
+        return self.session_store.delete(session_id)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """ SessionDBAuth module """
+from datetime import timezone
 from api.v1.auth.session_exp_auth import SessionExpAuth
 from models.user_session import UserSession
 
@@ -7,6 +8,26 @@ from models.user_session import UserSession
 class SessionDBAuth(SessionExpAuth):
     """ Session authentication with database support """
 
+    def __init__(self):
+        """ Schedule the expiration of the sessions already stored """
+        super().__init__()
+        UserSession.reload_if_changed()
+        for user_session in UserSession.all():
+            created_at = user_session.created_at.replace(tzinfo=timezone.utc)
+            self._schedule(user_session.session_id, created_at.timestamp())
+
+    def _evict(self, session_ids):
+        """ Remove expired sessions from the store and the database """
+        evicted = super()._evict(session_ids)
+        UserSession.reload_if_changed()
+        user_sessions = []
+        for session_id in session_ids:
+            user_sessions.extend(
+                UserSession.search({"session_id": session_id}))
+        UserSession.remove_many(user_sessions)
+        return list(set(evicted).union(
+            user_session.session_id for user_session in user_sessions))
+
     def create_session(self, user_id=None):
         """ Create a session and save it in the database """
         session_id = super().create_session(user_id)
@@ -22,10 +43,10 @@ class SessionDBAuth(SessionExpAuth):
         if session_id is None:
             return None
 
-        from models.user_session import UserSession
-        UserSession.load_from_file()
+        # Reload only if another worker changed the sessions file
+        UserSession.reload_if_changed()
 
-        # Search for the session by session_id
+        # Search for the session by session_id (indexed lookup)
         user_sessions = UserSession.search({"session_id": session_id})
         if not user_sessions:
             return None
@@ -56,10 +77,14 @@ class SessionDBAuth(SessionExpAuth):
         if not session_id:
             return False
 
+        UserSession.reload_if_changed()
         user_sessions = UserSession.search({"session_id": session_id})
         if not user_sessions:
             return False
 
         user_session = user_sessions[0]
         user_session.remove()
+        self.session_store.delete(session_id)
+        with self._expiry_lock:
+            self.live_sessions = max(self.live_sessions - 1, 0)
         return True
@@ -1,39 +1,112 @@
 #!/usr/bin/env python3
 """Session Expiration Authentication module."""
-import os
+import heapq
+import logging
+import threading
+import time
 from datetime import datetime, timedelta
 from api.v1.auth.session_auth import SessionAuth
+from models.env import env_float, env_int
 
 
 class SessionExpAuth(SessionAuth):
-    """Session authentication with expiration."""
+    """Session authentication with expiration.
+
+    Sessions are also pushed on a heap ordered by expiration time. A
+    background reaper (every SESSION_REAP_INTERVAL seconds) pops the
+    expired ones in batches of SESSION_REAP_BATCH and evicts them from
+    the session store.
+    """
+    session_records = True
 
     def __init__(self):
         """Initialize the instance with session duration."""
-        try:
-            self.session_duration = int(os.getenv('SESSION_DURATION', 0))
-        except ValueError:
-            self.session_duration = 0
+        super().__init__()
+        self.session_duration = env_int('SESSION_DURATION', 0)
+        self.reap_interval = env_float('SESSION_REAP_INTERVAL', 60)
+        self.reap_batch = env_int('SESSION_REAP_BATCH', 1000)
+        self.evicted_sessions = 0
+        self.live_sessions = 0
+        self._expiry_heap = []
+        self._expiry_lock = threading.Lock()
+        if self.session_duration > 0 and self.reap_interval > 0:
+            threading.Thread(target=self._reaper, daemon=True).start()
 
     def create_session(self, user_id=None):
-        """Create a session ID and store session details."""
+        """Create a session ID and schedule its expiration."""
         session_id = super().create_session(user_id)
         if not session_id:
             return None
-
-        session_dict = {
-            "user_id": user_id,
-            "created_at": datetime.now()
-        }
-        self.user_id_by_session_id[session_id] = session_dict
+        self._schedule(session_id, time.time())
         return session_id
 
+    def destroy_session(self, request=None):
+        """Delete the user session/logout."""
+        destroyed = super().destroy_session(request)
+        if destroyed:
+            with self._expiry_lock:
+                self.live_sessions = max(self.live_sessions - 1, 0)
+        return destroyed
+
+    def _schedule(self, session_id, created_at: float):
+        """Push a session created at `created_at` (epoch) on the heap."""
+        with self._expiry_lock:
+            self.live_sessions += 1
+            if self.session_duration > 0:
+                heapq.heappush(self._expiry_heap,
+                               (created_at + self.session_duration,
+                                session_id))
+
+    def _evict(self, session_ids):
+        """Remove expired sessions from the session store."""
+        return [session_id for session_id in session_ids
+                if self.session_store.delete(session_id)]
+
+    def reap_expired(self, now: float = None) -> int:
+        """Evict up to one batch of expired sessions.
+            Return: the number of sessions evicted.
+        """
+        if now is None:
+            now = time.time()
+        expired = []
+        with self._expiry_lock:
+            while self._expiry_heap and len(expired) < self.reap_batch:
+                if self._expiry_heap[0][0] > now:
+                    break
+                expired.append(heapq.heappop(self._expiry_heap)[1])
+        if not expired:
+            return 0
+        evicted = len(self._evict(expired))
+        with self._expiry_lock:
+            self.evicted_sessions += evicted
+            self.live_sessions = max(self.live_sessions - evicted, 0)
+        return evicted
+
+    def _reaper(self):
+        """Background loop evicting expired sessions."""
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                while self.reap_expired() >= self.reap_batch:
+                    pass
+            except Exception:
+                # keep the reaper alive, but don't hide the error
+                logging.getLogger(__name__).exception(
+                    "Can't evict expired sessions, retrying in %ss",
+                    self.reap_interval)
+
+    def session_counters(self) -> dict:
+        """Return the live and evicted session counters."""
+        with self._expiry_lock:
+            return {"live": self.live_sessions,
+                    "evicted": self.evicted_sessions}
+
     def user_id_for_session_id(self, session_id=None):
         """Retrieve a user ID for a session ID, considering expiration."""
         if session_id is None:
             return None
 
-        session_dict = self.user_id_by_session_id.get(session_id)
+        session_dict = self.session_store.get(session_id)
         if not session_dict:
             return None
 
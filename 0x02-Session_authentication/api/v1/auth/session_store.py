@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+""" Session store module.
+
+A session store maps a session ID to a record
+{"user_id": str, "created_at": datetime}. The store used by SessionAuth
+and its subclasses is selected with the SESSION_STORE environment
+variable:
+  - memory (default): a dict local to the process
+  - sqlite: a SQLite database in WAL mode (SESSION_STORE_PATH),
+    shared by every worker process on the box
+  - shm: the same SQLite database kept in shared memory (/dev/shm),
+    for pre-fork workers that don't need sessions to survive a reboot
+"""
+from datetime import datetime
+from os import getenv
+import os
+import sqlite3
+import threading
+
+
+class SessionStore:
+    """ Interface of a session store """
+
+    def get(self, session_id: str) -> dict:
+        """ Return the record of a session ID, or None """
+        raise NotImplementedError
+
+    def set(self, session_id: str, user_id: str, created_at: datetime):
+        """ Store the record of a session ID """
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        """ Delete a session ID, return True if it existed """
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """ Sessions in a dictionary of the current process.
+
+    With plain, the dictionary maps session IDs to bare user IDs (the
+    layout of SessionAuth.user_id_by_session_id) and records are read
+    back without created_at.
+    """
+
+    def __init__(self, data: dict = None, plain: bool = False):
+        """ Initialize the store on top of an existing dictionary """
+        self.data = data if data is not None else {}
+        self.plain = plain
+
+    def get(self, session_id: str) -> dict:
+        """ Return the record of a session ID, or None """
+        value = self.data.get(session_id)
+        if value is None or type(value) is dict:
+            return value
+        return {"user_id": value, "created_at": None}
+
+    def set(self, session_id: str, user_id: str, created_at: datetime):
+        """ Store the record of a session ID """
+        if self.plain:
+            self.data[session_id] = user_id
+        else:
+            self.data[session_id] = {"user_id": user_id,
+                                     "created_at": created_at}
+
+    def delete(self, session_id: str) -> bool:
+        """ Delete a session ID, return True if it existed """
+        return self.data.pop(session_id, None) is not None
+
+
+class SQLiteSessionStore(SessionStore):
+    """ Sessions in a SQLite database in WAL mode, shared by processes """
+
+    def __init__(self, db_path: str):
+        """ Initialize the store and create its table if needed """
+        self.db_path = db_path
+        self.__local = threading.local()
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                         "session_id TEXT PRIMARY KEY, "
+                         "user_id TEXT NOT NULL, "
+                         "created_at REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current thread, reopened after a fork """
+        conn = getattr(self.__local, 'conn', None)
+        if conn is None or self.__local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self.__local.conn = conn
+            self.__local.pid = os.getpid()
+        return conn
+
+    def get(self, session_id: str) -> dict:
+        """ Return the record of a session ID, or None """
+        row = self._connection().execute(
+            "SELECT user_id, created_at FROM sessions WHERE session_id = ?",
+            (session_id,)).fetchone()
+        if row is None:
+            return None
+        return {"user_id": row[0],
+                "created_at": datetime.fromtimestamp(row[1])}
+
+    def set(self, session_id: str, user_id: str, created_at: datetime):
+        """ Store the record of a session ID """
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO sessions "
+                         "(session_id, user_id, created_at) "
+                         "VALUES (?, ?, ?)",
+                         (session_id, user_id, created_at.timestamp()))
+
+    def delete(self, session_id: str) -> bool:
+        """ Delete a session ID, return True if it existed """
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+
+def session_store(data: dict = None, plain: bool = False) -> SessionStore:
+    """ Create the session store selected by SESSION_STORE.
+        `data` backs the in-memory store, `plain` selects its layout.
+    """
+    store_type = getenv("SESSION_STORE", "memory")
+    if store_type == "sqlite":
+        return SQLiteSessionStore(
+            getenv("SESSION_STORE_PATH", ".db_sessions.sqlite"))
+    if store_type == "shm":
+        return SQLiteSessionStore(
+            getenv("SESSION_STORE_PATH", "/dev/shm/api_v1_sessions.sqlite"))
+    return MemorySessionStore(data, plain)
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+""" Metrics of the API (see models.metrics), served by GET
+/api/v1/metrics
+"""
+from models.metrics import Histogram
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from before_request to after_request, per route",
+    ("method", "route", "status"))
+STAGE_SECONDS = Histogram(
+    "http_request_stage_seconds",
+    "Time spent in each stage of a request: path matching, credentials, "
+    "session and user lookups, password check, JSON encoding",
+    ("stage",))
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 """ Module of Index views
 """
-from flask import jsonify, abort
+from flask import json, jsonify, abort, Response
 from api.v1.views import app_views
+from api.v1.views.payloads import compact, payload_response
+from models.metrics import render
+
+# stats => serialized stats, for the last stats sent
+STATS_PAYLOAD = {}
 
 
 @app_views.route('/status', methods=['GET'], strict_slashes=False)
@@ -23,7 +28,26 @@ def stats() -> str:
     from models.user import User
     stats = {}
     stats['users'] = User.count()
-    return jsonify(stats)
+    if not compact():
+        return jsonify(stats)
+    key = tuple(stats.items())
+    payload = STATS_PAYLOAD.get(key)
+    if payload is None:
+        payload = json.dumps(stats, separators=(",", ":")).encode()
+        STATS_PAYLOAD.clear()
+        STATS_PAYLOAD[key] = payload
+    return payload_response(payload)
+
+
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def metrics() -> str:
+    """ GET /api/v1/metrics
+    Return:
+      - request, auth stage and storage metrics in the Prometheus text
+        format
+    """
+    return Response(render(),
+                    content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app_views.route('/unauthorized', methods=['GET'], strict_slashes=False)
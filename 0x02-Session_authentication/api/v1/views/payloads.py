@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+""" Responses built from pre-serialized JSON payloads
+"""
+from api.v1.metrics import STAGE_SECONDS
+from flask import current_app, jsonify, Response
+from flask.json.provider import DefaultJSONProvider
+from time import perf_counter
+from typing import Iterable
+
+
+def compact() -> bool:
+    """ True if jsonify() writes compact JSON with sorted keys, the
+    format of the payloads cached by models
+    """
+    provider = current_app.json
+    if not isinstance(provider, DefaultJSONProvider) \
+            or not provider.sort_keys or not provider.ensure_ascii:
+        return False
+    if provider.compact is None:
+        return not current_app.debug
+    return provider.compact is not False
+
+
+def payload_response(payload: bytes) -> Response:
+    """ Response of a JSON payload, as jsonify() would send it
+    """
+    return current_app.response_class(payload + b"\n",
+                                      mimetype=current_app.json.mimetype)
+
+
+def object_response(obj) -> Response:
+    """ jsonify(obj.to_json()), reusing the cached payload of obj
+    """
+    start = perf_counter()
+    if not compact():
+        response = jsonify(obj.to_json())
+    else:
+        response = payload_response(obj.to_json_payload())
+    STAGE_SECONDS.observe(perf_counter() - start, "json_encode")
+    return response
+
+
+def list_response(objs: Iterable) -> Response:
+    """ jsonify([obj.to_json() for obj in objs]), reusing the cached
+    payloads of the objects
+    """
+    start = perf_counter()
+    if not compact():
+        response = jsonify([obj.to_json() for obj in objs])
+    else:
+        response = payload_response(
+            b"[" + b",".join(obj.to_json_payload() for obj in objs) + b"]")
+    STAGE_SECONDS.observe(perf_counter() - start, "json_encode")
+    return response
@@ -3,6 +3,7 @@
 import os
 from flask import jsonify, request
 from api.v1.views import app_views
+from api.v1.views.payloads import object_response
 from models.user import User
 
 
@@ -31,7 +32,7 @@ def session_auth_login():
             from api.v1.app import auth
             session_id = auth.create_session(user.id)
 
-            response = jsonify(user.to_json())
+            response = object_response(user)
             session_name = os.getenv('SESSION_NAME', '_my_session_id')
             response.set_cookie(session_name, session_id)
             return response
@@ -2,18 +2,81 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from api.v1.views.payloads import compact, list_response, object_response
+from flask import (abort, jsonify, request, g, current_app, Response,
+                   stream_with_context)
 from models.user import User
 
+STREAM_CHUNK_SIZE = 1000
+
+
+def stream_users(order_by: str, after: str = None):
+    """ Yield the JSON list of all users, in chunks of STREAM_CHUNK_SIZE.
+    The IDs are sorted once when the stream starts; users removed since
+    are skipped
+    """
+    ids = User.ordered_ids(order_by, after)
+    yield "["
+    first = True
+    cached = compact()
+    for start in range(0, len(ids), STREAM_CHUNK_SIZE):
+        chunk = []
+        for user_id in ids[start:start + STREAM_CHUNK_SIZE]:
+            user = User.get(user_id)
+            if user is None:
+                continue
+            if not first:
+                chunk.append(",")
+            first = False
+            if cached:
+                chunk.append(user.to_json_payload().decode())
+            else:
+                chunk.append(current_app.json.dumps(user.to_json()))
+        yield "".join(chunk)
+    yield "]\n"
+
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (optional):
+      - limit: max number of users to return
+      - after: ID of the last user of the previous page
+      - order_by: id (default) or created_at
+      - stream: if 1, send all users as a chunked response
     Return:
       - list of all User objects JSON represented
+      - with limit, one page of them; the `after` value of the next
+        page is sent in the X-Next-After header
+      - 400 if a parameter is invalid
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    order_by = request.args.get('order_by', 'id')
+    if order_by not in ('id', 'created_at'):
+        return jsonify({'error': "order_by must be id or created_at"}), 400
+
+    if request.args.get('stream') == '1':
+        if after is not None and order_by == 'created_at' \
+                and User.get(after) is None:
+            return jsonify({'error': "unknown after"}), 400
+        return Response(stream_with_context(stream_users(order_by, after)),
+                        mimetype='application/json')
+
+    if limit is None and after is None:
+        return list_response(User.all())
+
+    try:
+        limit = int(limit) if limit is not None else User.count()
+        if limit < 0:
+            raise ValueError
+        users = User.page(limit, after, order_by)
+    except ValueError:
+        return jsonify({'error': "invalid limit or after"}), 400
+    response = list_response(users)
+    if limit > 0 and len(users) == limit:
+        response.headers['X-Next-After'] = users[-1].id
+    return response
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -32,18 +95,18 @@ def view_one_user(user_id: str = None) -> str:
 
     # Handle 'me' as the user_id
     if user_id == "me":
-        if request.current_user is None:
+        user = g.get('current_user')
+        if user is None:
             abort(404)
-        user = request.current_user
-        return jsonify(user.to_json())
+        return object_response(user)
 
     # Default behavior
     user = User.get(user_id)
     if user is None:
         abort(404)
-    if request.current_user is None:
+    if g.get('current_user') is None:
         abort(404)
-    return jsonify(user.to_json())
+    return object_response(user)
 
 
 @app_views.route('/users', methods=['POST'], strict_slashes=False)
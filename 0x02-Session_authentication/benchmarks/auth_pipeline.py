@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+""" Micro-benchmarks of the authentication pipeline
+
+Seeds DATA with 1k, 100k and 1M users and sessions (--sizes) and times
+Auth.require_auth, the BasicAuth chain, the session auth classes and
+Base search/save_to_file/load_from_file, one by one and through the
+Flask test client:
+    python3 -m benchmarks.auth_pipeline [--sizes 1000,100000]
+        [--seconds 0.5] [--only session] [--output run.json]
+        [--baseline run.json --tolerance 0.2]
+
+Files are written in a temporary directory. With --baseline, the run
+fails (exit status 1) if a benchmark is slower than in the baseline by
+more than --tolerance (a fraction).
+"""
+from itertools import cycle
+import argparse
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PASSWORD = "H0lbertonSchool98!"
+
+
+class Request():
+    """ Stand-in for the flask request read by the auth classes
+    """
+
+    def __init__(self, headers: dict = None, cookies: dict = None):
+        """ Initialize with headers and cookies
+        """
+        self.headers = headers or {}
+        self.cookies = cookies or {}
+
+
+def measure(fn, seconds: float) -> (float, int):
+    """ Call fn in growing batches for about `seconds`.
+    Return: (microseconds per call, number of calls)
+    """
+    calls = 0
+    elapsed = 0.0
+    batch = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        elapsed += time.perf_counter() - start
+        calls += batch
+        if elapsed >= seconds:
+            return elapsed * 1e6 / calls, calls
+        batch *= 2
+
+
+def seed(size: int):
+    """ Replace the stored users and sessions by `size` of each.
+    Return: the users
+    """
+    from models.base import DATA, INDEXES, SIGNATURES
+    from models.hashers import make_password
+    from models.user import User
+    from models.user_session import UserSession
+    from api.v1.auth.session_auth import SessionAuth
+
+    for store in (DATA, INDEXES, SIGNATURES):
+        store.clear()
+    SessionAuth.user_id_by_session_id.clear()
+    hashed = make_password(PASSWORD)
+    users = [User(email="user{}@hbtn.io".format(i), _password=hashed,
+                  first_name="first{}".format(i))
+             for i in range(size)]
+    User.save_many(users)
+    UserSession.save_many(UserSession(user_id=users[i].id,
+                                      session_id="db-session-{}".format(i))
+                          for i in range(size))
+    return users
+
+
+def benchmarks(size: int, users: list, app_module):
+    """ Yield (name, function) of every benchmark for `size` seeded users,
+    requests going through the Flask app of app_module (api.v1.app)
+    """
+    from api.v1.auth.auth import Auth
+    from api.v1.auth.basic_auth import BasicAuth
+    from api.v1.auth.session_auth import SessionAuth
+    from api.v1.auth.session_exp_auth import SessionExpAuth
+    from api.v1.auth.session_db_auth import SessionDBAuth
+    from models.user import User
+
+    step = max(size // 1000, 1)
+    sample = users[::step]
+    user_ids = cycle([user.id for user in sample])
+    emails = cycle([user.email for user in sample])
+    decoded = "{}:{}".format(users[0].email, PASSWORD)
+    b64 = base64.b64encode(decoded.encode()).decode()
+    header = "Basic " + b64
+    excluded = app_module.excluded_paths
+
+    auth = Auth()
+    yield "Auth.require_auth", \
+        lambda: auth.require_auth("/api/v1/users/me", excluded)
+
+    basic = BasicAuth()
+    yield "BasicAuth.extract_base64_authorization_header", \
+        lambda: basic.extract_base64_authorization_header(header)
+    yield "BasicAuth.decode_base64_authorization_header", \
+        lambda: basic.decode_base64_authorization_header(b64)
+    yield "BasicAuth.extract_user_credentials", \
+        lambda: basic.extract_user_credentials(decoded)
+    yield "BasicAuth.user_object_from_credentials", \
+        lambda: basic.user_object_from_credentials(next(emails), PASSWORD)
+    request = Request({"Authorization": header})
+    basic.current_user(request)
+    yield "BasicAuth.current_user (cached)", \
+        lambda: basic.current_user(request)
+
+    session_auths = (("SessionAuth", SessionAuth()),
+                     ("SessionExpAuth", SessionExpAuth()),
+                     ("SessionDBAuth", SessionDBAuth()))
+    for name, session_auth in session_auths[:2]:
+        session_ids = cycle([session_auth.create_session(next(user_ids))
+                             for _ in range(size)][::step])
+        yield name + ".create_session", \
+            lambda a=session_auth: a.create_session(next(user_ids))
+        yield name + ".user_id_for_session_id", \
+            lambda a=session_auth, s=session_ids: \
+            a.user_id_for_session_id(next(s))
+    db_auth = session_auths[2][1]
+    db_session_ids = cycle(["db-session-{}".format(i)
+                            for i in range(0, size, step)])
+    yield "SessionDBAuth.create_session", \
+        lambda: db_auth.create_session(next(user_ids))
+    yield "SessionDBAuth.user_id_for_session_id", \
+        lambda: db_auth.user_id_for_session_id(next(db_session_ids))
+
+    yield "Base.get", lambda: User.get(next(user_ids))
+    yield "Base.search (indexed)", \
+        lambda: User.search({"email": next(emails)})
+    yield "Base.search (scan)", \
+        lambda: User.search({"first_name": "first0"})
+    yield "Base.save_to_file", User.save_to_file
+    yield "Base.load_from_file", User.load_from_file
+
+    client = app_module.app.test_client()
+    session_name = os.environ["SESSION_NAME"]
+    yield "GET /api/v1/status", lambda: client.get("/api/v1/status")
+    app_module.auth = basic
+    yield "GET /api/v1/users/me (basic_auth)", \
+        lambda: client.get("/api/v1/users/me",
+                           headers={"Authorization": header})
+    for name, session_auth in session_auths:
+        session_id = session_auth.create_session(users[0].id)
+
+        def get_me(a=session_auth, s=session_id):
+            app_module.auth = a
+            client.set_cookie(session_name, s)
+            return client.get("/api/v1/users/me")
+        yield "GET /api/v1/users/me ({})".format(name), get_me
+
+
+def run(sizes: list, seconds: float, only: str = None) -> dict:
+    """ Run every benchmark for every size.
+    Return: {size: {name: microseconds per call}}
+    """
+    # Importing the app loads the stored users: do it before seeding
+    from api.v1 import app as app_module
+    results = {}
+    for size in sizes:
+        users = seed(size)
+        results[str(size)] = {}
+        print("{} users and sessions".format(size))
+        for name, fn in benchmarks(size, users, app_module):
+            if only is not None and only not in name:
+                continue
+            per_call, calls = measure(fn, seconds)
+            results[str(size)][name] = per_call
+            print("  {:<52} {:>12.2f} us/call  ({} calls)"
+                  .format(name, per_call, calls))
+    return results
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """ (size, name, baseline, result) of every benchmark slower than
+    its baseline by more than tolerance
+    """
+    slower = []
+    for size, timings in results.items():
+        for name, per_call in timings.items():
+            before = baseline.get(size, {}).get(name)
+            if before is not None and per_call > before * (1 + tolerance):
+                slower.append((size, name, before, per_call))
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="comma-separated numbers of users")
+    parser.add_argument("--seconds", type=float, default=0.5,
+                        help="time spent on each benchmark")
+    parser.add_argument("--only", help="run benchmarks whose name "
+                        "contains this")
+    parser.add_argument("--output", help="write the results (JSON)")
+    parser.add_argument("--baseline", help="results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    os.environ.setdefault("SESSION_NAME", "_my_session_id")
+    os.environ.setdefault("SESSION_DURATION", "3600")
+    workdir = tempfile.mkdtemp(prefix="auth_pipeline_")
+    os.chdir(workdir)
+    try:
+        results = run(sizes, args.seconds, args.only)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        slower = regressions(results, baseline, args.tolerance)
+        for size, name, before, per_call in slower:
+            print("REGRESSION {} @ {}: {:.2f} -> {:.2f} us/call"
+                  .format(name, size, before, per_call))
+        if slower:
+            sys.exit(1)
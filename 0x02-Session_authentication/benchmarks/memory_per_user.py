@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+""" Memory benchmark of the User representation
+
+Reports the bytes per user held in DATA for the slotted User and for
+the previous layout (same attributes in a per-instance __dict__):
+    python3 -m benchmarks.memory_per_user [--users 1000000]
+"""
+from datetime import datetime
+import argparse
+import gc
+import tracemalloc
+import uuid
+from models.base import DATA
+from models.user import User
+
+
+class DictUser():
+    """ User laid out as before: every attribute in __dict__
+    """
+
+    def __init__(self, **kwargs):
+        """ Same attributes as User, in the same order
+        """
+        self.id = kwargs['id']
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        self.email = kwargs['email']
+        self._password = kwargs['_password']
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+
+def record(i: int) -> dict:
+    """ JSON record of the i-th user
+    """
+    return {"id": str(uuid.uuid4()), "email": "user{}@hbtn.io".format(i),
+            "_password": "{:064x}".format(i), "first_name": None,
+            "last_name": None}
+
+
+def bytes_per_user(cls, users: int) -> float:
+    """ Build `users` objects of cls in a dict and return their average
+    size, strings shared with the records excluded
+    """
+    records = [record(i) for i in range(users)]
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objs = {}
+    for obj_json in records:
+        objs[obj_json["id"]] = cls(**obj_json)
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return size / users
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000000)
+    args = parser.parse_args()
+    DATA["User"] = {}
+    before = bytes_per_user(DictUser, args.users)
+    after = bytes_per_user(User, args.users)
+    print("{} users".format(args.users))
+    print("__dict__ layout: {:8.1f} bytes/user".format(before))
+    print("__slots__ User:  {:8.1f} bytes/user".format(after))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+""" Password hashers benchmark
+
+Reports logins/sec (one hash verification per login) for each
+algorithm and cost setting:
+    python3 -m benchmarks.password_hashers [--seconds 2]
+"""
+import argparse
+import time
+from models.hashers import (SHA256Hasher, PBKDF2Hasher, ScryptHasher,
+                            BcryptHasher, bcrypt)
+
+PASSWORD = "H0lbertonSchool98!"
+
+
+def settings():
+    """ Yield (label, hasher) for every algorithm and cost to measure
+    """
+    yield "sha256", SHA256Hasher()
+    for iterations in (10000, 100000, 600000):
+        yield "pbkdf2_sha256 iterations={}".format(iterations), \
+            PBKDF2Hasher(iterations)
+    for n in (4096, 16384, 65536):
+        yield "scrypt n={} r=8 p=1".format(n), ScryptHasher(n, 8, 1)
+    if bcrypt is not None:
+        for rounds in (10, 12, 14):
+            yield "bcrypt rounds={}".format(rounds), BcryptHasher(rounds)
+
+
+def logins_per_sec(hasher, seconds: float) -> float:
+    """ Verify the same password for `seconds` and return the rate
+    """
+    encoded = hasher.encode(PASSWORD)
+    count = 0
+    start = time.perf_counter()
+    while True:
+        hasher.verify(PASSWORD, encoded)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2,
+                        help="time spent on each setting")
+    args = parser.parse_args()
+    for label, hasher in settings():
+        rate = logins_per_sec(hasher, args.seconds)
+        print("{:<34} {:>12.1f} logins/sec".format(label, rate))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" Micro-benchmark of the Base timestamp codec
+
+Times the load (User(**record)) and dump (to_json(True)) of users with
+the previous strptime/strftime codec and with models.timestamp:
+    python3 -m benchmarks.timestamps [--records 1000000]
+"""
+from datetime import datetime, timedelta
+import argparse
+import time
+import uuid
+from models.base import DATA, TIMESTAMP_FORMAT
+from models.user import User
+
+
+class StrptimeUser(User):
+    """ User loaded and dumped as before models.timestamp
+    """
+    __slots__ = ()
+
+    def __init__(self, *args: list, **kwargs: dict):
+        """ Parse both timestamps with strptime
+        """
+        super().__init__(*args, **{k: v for k, v in kwargs.items()
+                                   if k not in ('created_at', 'updated_at')})
+        self.created_at = datetime.strptime(kwargs['created_at'],
+                                            TIMESTAMP_FORMAT)
+        self.updated_at = datetime.strptime(kwargs['updated_at'],
+                                            TIMESTAMP_FORMAT)
+
+    def to_json(self, for_serialization: bool = False) -> dict:
+        """ Format both timestamps with strftime on every call
+        """
+        result = {}
+        for key, _ in self.fields():
+            if not for_serialization and key[0] == '_':
+                continue
+            value = getattr(self, key)
+            if type(value) is datetime:
+                value = value.strftime(TIMESTAMP_FORMAT)
+            result[key] = value
+        return result
+
+
+def records(count: int) -> list:
+    """ JSON records of `count` users, as read from a file
+    """
+    start = datetime(2020, 1, 1)
+    result = []
+    for i in range(count):
+        stamp = (start + timedelta(seconds=i)).strftime(TIMESTAMP_FORMAT)
+        result.append({"id": str(uuid.uuid4()), "created_at": stamp,
+                       "updated_at": stamp, "email": "u{}@hbtn.io".format(i),
+                       "_password": "h", "first_name": None,
+                       "last_name": None})
+    return result
+
+
+def run(cls, objs_json: list) -> (float, float, float):
+    """ Seconds to load the records, to read every created_at, then to
+    dump every object
+    """
+    start = time.perf_counter()
+    objs = [cls(**obj_json) for obj_json in objs_json]
+    loaded = time.perf_counter()
+    for obj in objs:
+        obj.created_at
+    read = time.perf_counter()
+    for obj in objs:
+        obj.to_json(True)
+    dumped = time.perf_counter()
+    return loaded - start, read - loaded, dumped - read
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1000000)
+    args = parser.parse_args()
+    objs_json = records(args.records)
+    DATA[User.__name__] = {}
+    print("{} records      load      read created_at  dump"
+          .format(args.records))
+    for name, cls in (("strptime/strftime", StrptimeUser),
+                      ("models.timestamp", User)):
+        load, read, dump = run(cls, objs_json)
+        print("{:<18} {:8.2f}s {:8.2f}s {:14.2f}s"
+              .format(name, load, read, dump))
@@ -1,20 +1,67 @@
 #!/usr/bin/env python3
 """ Base module
 """
+from bisect import bisect_right
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
+from os import getenv
+from time import perf_counter
+from typing import TypeVar, List, Iterable, Iterator, Tuple
+import heapq
 import json
 import uuid
+from models.index import Index
+from models.env import env_int
+from models.lazy import LazyDict
+from models.lru import LRUCache
+from models.metrics import Counter, Histogram
+from models.storage import storage, write_snapshot
+from models.timestamp import TIMESTAMP_FORMAT, Timestamp
 
 
-TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+# With LAZY_LOAD=1, load_from_file() keeps the raw JSON of each object
+# and builds the object on its first get/search hit
+LAZY_LOAD = getenv("LAZY_LOAD", "0") == "1"
+# Serialized objects kept by to_json_payload(), least recently used
+# evicted first
+PAYLOAD_CACHE_SIZE = env_int("PAYLOAD_CACHE_SIZE", 10000)
+PAYLOADS = LRUCache(PAYLOAD_CACHE_SIZE)
 DATA = {}
+INDEXES = {}
+SAVE_SECONDS = Histogram("storage_save_seconds",
+                         "Time spent by save_to_file", ("class",))
+SAVED_BYTES = Counter("storage_saved_bytes_total",
+                      "Bytes written by save_to_file", ("class",))
+LOAD_SECONDS = Histogram("storage_load_seconds",
+                         "Time spent by load_from_file", ("class",))
+SIGNATURES = {}
+FIELDS = {}
 
 
 class Base():
     """ Base class
+
+    Subclasses declare secondary indexes in `indexes`, a dict of
+    attribute name => unique flag. Indexes are kept in sync by
+    save(), remove() and load_from_file(), and turn equality
+    searches on those attributes into dictionary lookups.
+
+    Subclasses declare their attributes in `__slots__`, so instances
+    carry no per-instance dict. A subclass without `__slots__` gets a
+    regular `__dict__`, serialized after the slots.
+
+    created_at and updated_at are Timestamp attributes: loaded strings
+    are kept for to_json(), datetimes are formatted once.
+
+    `version` counts the saves of the object; to_json_payload() caches
+    the serialized to_json() in PAYLOADS under (class, id, version).
+    Slots listed in `transient` aren't serialized.
     """
+    __slots__ = ('id', '_created_at', '_created_at_text',
+                 '_updated_at', '_updated_at_text', '_version')
+    indexes = {}
+    transient = ('_version',)
+    created_at = Timestamp()
+    updated_at = Timestamp()
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
@@ -22,16 +69,17 @@ class Base():
         s_class = str(self.__class__.__name__)
         if DATA.get(s_class) is None:
             DATA[s_class] = {}
+        if INDEXES.get(s_class) is None:
+            self.__class__.reset_indexes()
 
+        self._version = 0
         self.id = kwargs.get('id', str(uuid.uuid4()))
         if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
+            Base.created_at.load(self, kwargs.get('created_at'))
         else:
             self.created_at = datetime.utcnow()
         if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
+            Base.updated_at.load(self, kwargs.get('updated_at'))
         else:
             self.updated_at = datetime.utcnow()
 
@@ -44,11 +92,54 @@ class Base():
             return False
         return (self.id == other.id)
 
+    @classmethod
+    def fields(cls) -> tuple:
+        """ (name, Timestamp or None) of every slot attribute of the
+        class, base classes first
+        """
+        fields = FIELDS.get(cls)
+        if fields is None:
+            fields = []
+            for klass in reversed(cls.__mro__):
+                timestamps = {}
+                for value in klass.__dict__.values():
+                    if isinstance(value, Timestamp):
+                        timestamps[value.value_slot] = value
+                        timestamps[value.text_slot] = None
+                for slot in klass.__dict__.get('__slots__', ()):
+                    if slot == '__weakref__' or slot in cls.transient:
+                        continue
+                    if slot not in timestamps:
+                        fields.append((slot, None))
+                    elif timestamps[slot] is not None:
+                        fields.append((timestamps[slot].name,
+                                       timestamps[slot]))
+            fields = tuple(fields)
+            FIELDS[cls] = fields
+        return fields
+
+    def attributes(self) -> Iterator[Tuple[str, object]]:
+        """ Every (name, value) set on the object: slots, Timestamps in
+        their string form, then the `__dict__` of subclasses without
+        `__slots__`
+        """
+        for key, timestamp in self.fields():
+            try:
+                if timestamp is not None:
+                    value = timestamp.dump(self)
+                else:
+                    value = getattr(self, key)
+            except AttributeError:
+                continue
+            yield key, value
+        if type(self).__dictoffset__ != 0:
+            yield from self.__dict__.items()
+
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        for key, value in self.attributes():
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -57,41 +148,152 @@ class Base():
                 result[key] = value
         return result
 
+    @property
+    def version(self) -> int:
+        """ Number of times the object was saved
+        """
+        return self._version
+
+    def to_json_payload(self) -> bytes:
+        """ to_json() as compact JSON with sorted keys, cached per
+        version: attributes changed without save() aren't seen
+        """
+        key = (self.__class__.__name__, self.id, self._version)
+        payload = PAYLOADS.get(key)
+        if payload is None:
+            payload = json.dumps(self.to_json(), sort_keys=True,
+                                 separators=(",", ":")).encode()
+            PAYLOADS.put(key, payload)
+        return payload
+
+    @classmethod
+    def reset_indexes(cls):
+        """ (Re)create the empty secondary indexes of the class
+        """
+        INDEXES[cls.__name__] = {attr: Index(attr, unique)
+                                 for attr, unique in cls.indexes.items()}
+
     @classmethod
     def load_from_file(cls):
-        """ Load all objects from file
+        """ Load all objects from the storage engine, one record at a
+        time (see LAZY_LOAD)
         """
+        start = perf_counter()
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        # Before DATA is emptied: the storage may write pending changes
+        records = storage.load(cls)
+        SIGNATURES[s_class] = storage.signature(cls)
+        # Loaded objects start again at version 0
+        PAYLOADS.discard_if(lambda key: key[0] == s_class)
+        objs = LazyDict(cls) if LAZY_LOAD else {}
+        DATA[s_class] = objs
+        cls.reset_indexes()
+        indexes = INDEXES[s_class].values()
+        for obj_id, obj_json in records:
+            if obj_json is None:
+                if dict.pop(objs, obj_id, None) is not None:
+                    for index in indexes:
+                        index.discard(obj_id)
+                continue
+            if LAZY_LOAD:
+                objs.put_record(obj_id, obj_json)
+            else:
+                objs[obj_id] = cls(**obj_json)
+            for index in indexes:
+                index.add(obj_id, obj_json.get(index.attribute))
+        LOAD_SECONDS.observe(perf_counter() - start, s_class)
+
+    @classmethod
+    def records(cls) -> Iterator[Tuple[str, dict]]:
+        """ Every (ID, serialized JSON dictionary) of the class. The IDs
+        are read right away, the dictionaries as they are iterated
+        """
+        objs = DATA[cls.__name__]
+        if isinstance(objs, LazyDict):
+            return objs.records()
+        return ((obj_id, obj.to_json(True))
+                for obj_id, obj in list(objs.items()))
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def reload_if_changed(cls) -> bool:
+        """ Load all objects again only if another process changed the
+        stored objects since they were loaded (or last written here)
+        """
+        if SIGNATURES.get(cls.__name__) == storage.signature(cls):
+            return False
+        cls.load_from_file()
+        return True
 
     @classmethod
-    def save_to_file(cls):
-        """ Save all objects to file
+    def save_to_file(cls, durable: bool = False, atomic: bool = False):
+        """ Save all objects to file (see write_snapshot for durable and
+        atomic)
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        start = perf_counter()
+        objs_json = dict(cls.records())
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+        size = write_snapshot(cls, objs_json, durable, atomic)
+        SAVE_SECONDS.observe(perf_counter() - start, cls.__name__)
+        SAVED_BYTES.inc(size, cls.__name__)
 
     def save(self):
         """ Save current object
         """
         s_class = self.__class__.__name__
+        for index in INDEXES[s_class].values():
+            index.check(self.id, getattr(self, index.attribute, None))
         self.updated_at = datetime.utcnow()
+        self._version += 1
         DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        for index in INDEXES[s_class].values():
+            index.add(self.id, getattr(self, index.attribute, None))
+        storage.save(self)
+        if not storage.deferred:
+            SIGNATURES[s_class] = storage.signature(self.__class__)
+
+    @classmethod
+    def save_many(cls, objs: Iterable[TypeVar('Base')],
+                  persist: bool = True) -> int:
+        """ Save several objects, writing the storage once at the end
+        (or not at all if persist is False: call persist() later)
+
+        Timestamps are kept as they are. Nothing is saved if one of the
+        objects breaks a unique index.
+        """
+        s_class = cls.__name__
+        objs = list(objs)
+        for index in INDEXES[s_class].values():
+            seen = {}
+            for obj in objs:
+                value = getattr(obj, index.attribute, None)
+                index.check(obj.id, value)
+                if index.unique and value is not None \
+                        and obj.id not in (index.lookup(value) or ()):
+                    if seen.setdefault(value, obj.id) != obj.id:
+                        raise ValueError("{} {} already exists"
+                                         .format(index.attribute, value))
+        for obj in objs:
+            obj._version += 1
+            DATA[s_class][obj.id] = obj
+            for index in INDEXES[s_class].values():
+                index.add(obj.id, getattr(obj, index.attribute, None))
+        if persist:
+            cls.persist()
+        return len(objs)
+
+    @classmethod
+    def persist(cls):
+        """ Write every in-memory object of the class to the storage
+        """
+        storage.save_all(cls)
+        SIGNATURES[cls.__name__] = storage.signature(cls)
+
+    @classmethod
+    def flush(cls, durable: bool = False):
+        """ Write the changes of the class the storage still holds back
+        (STORAGE_TYPE=group) now; with durable, also sync them to disk
+        """
+        storage.flush(cls, durable)
 
     def remove(self):
         """ Remove object
@@ -99,7 +301,29 @@ class Base():
         s_class = self.__class__.__name__
         if DATA[s_class].get(self.id) is not None:
             del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+            for index in INDEXES[s_class].values():
+                index.discard(self.id)
+            storage.remove(self)
+            if not storage.deferred:
+                SIGNATURES[s_class] = storage.signature(self.__class__)
+
+    @classmethod
+    def remove_many(cls, objs: Iterable[TypeVar('Base')]) -> int:
+        """ Remove several objects and persist them at once
+        """
+        s_class = cls.__name__
+        removed = []
+        for obj in objs:
+            if dict.pop(DATA[s_class], obj.id, None) is None:
+                continue
+            for index in INDEXES[s_class].values():
+                index.discard(obj.id)
+            removed.append(obj)
+        if len(removed) > 0:
+            storage.remove_many(cls, removed)
+            if not storage.deferred:
+                SIGNATURES[s_class] = storage.signature(cls)
+        return len(removed)
 
     @classmethod
     def count(cls) -> int:
@@ -114,6 +338,65 @@ class Base():
         """
         return cls.search()
 
+    @classmethod
+    def page(cls, limit: int, after: str = None,
+             order_by: str = 'id') -> List[TypeVar('Base')]:
+        """ Return at most `limit` objects following the object of ID
+        `after`, ordered by id or by created_at (then id)
+
+        The page is selected with a heap of size `limit` instead of
+        sorting every object.
+        """
+        s_class = cls.__name__
+        if order_by == 'id':
+            # IDs are the keys of DATA: only the page is built
+            ids = list(DATA[s_class].keys())
+            if after is not None:
+                ids = (obj_id for obj_id in ids if obj_id > after)
+            objs = [DATA[s_class].get(obj_id)
+                    for obj_id in heapq.nsmallest(limit, ids)]
+            return [obj for obj in objs if obj is not None]
+        elif order_by == 'created_at':
+            def key(obj):
+                return (obj.created_at, obj.id)
+            if after is not None:
+                after_obj = DATA[s_class].get(after)
+                if after_obj is None:
+                    raise ValueError("unknown cursor {}".format(after))
+                after_key = key(after_obj)
+        else:
+            raise ValueError("can't order by {}".format(order_by))
+
+        objs = list(DATA[s_class].values())
+        if after is not None:
+            objs = (obj for obj in objs if key(obj) > after_key)
+        return heapq.nsmallest(limit, objs, key=key)
+
+    @classmethod
+    def ordered_ids(cls, order_by: str = 'id',
+                    after: str = None) -> List[str]:
+        """ IDs of every object following the object of ID `after`, in
+        the order of page(), sorted once: walking a whole listing with
+        it costs one sort instead of one scan per page
+        """
+        s_class = cls.__name__
+        if order_by == 'id':
+            ids = sorted(DATA[s_class].keys())
+            if after is not None:
+                ids = ids[bisect_right(ids, after):]
+            return ids
+        elif order_by != 'created_at':
+            raise ValueError("can't order by {}".format(order_by))
+
+        keys = sorted((obj.created_at, obj.id)
+                      for obj in list(DATA[s_class].values()))
+        if after is not None:
+            after_obj = DATA[s_class].get(after)
+            if after_obj is None:
+                raise ValueError("unknown cursor {}".format(after))
+            keys = keys[bisect_right(keys, (after_obj.created_at, after)):]
+        return [obj_id for _, obj_id in keys]
+
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
@@ -124,8 +407,23 @@ class Base():
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
+
+        If one of the attributes is indexed, only the objects found
+        in that index are compared.
         """
         s_class = cls.__name__
+        candidates = None
+        for k, v in attributes.items():
+            index = INDEXES.get(s_class, {}).get(k)
+            if index is not None:
+                ids = index.lookup(v)
+                if ids is not None:
+                    candidates = [DATA[s_class].get(obj_id) for obj_id in ids]
+                    candidates = [obj for obj in candidates
+                                  if obj is not None]
+                    break
+        if candidates is None:
+            candidates = DATA[s_class].values()
 
         def _search(obj):
             if len(attributes) == 0:
@@ -135,4 +433,4 @@ class Base():
                     return False
             return True
 
-        return list(filter(_search, DATA[s_class].values()))
+        return list(filter(_search, candidates))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+""" Bulk import/export of users
+
+    python3 -m models.bulk import users.ndjson [--batch 10000]
+    python3 -m models.bulk import users.csv [--processes 4]
+    python3 -m models.bulk export users.ndjson
+
+Import reads NDJSON (one JSON object per line) or CSV (with a header
+row). Each record has an email and either a clear `password`, hashed
+in parallel across processes, or an already hashed `_password`;
+first_name, last_name, id, created_at and updated_at are optional.
+Users are added to DATA batch by batch and the storage is written once
+at the end. Records without an email, whose email or password isn't a
+string, or whose email is already taken, are skipped.
+
+Export writes one JSON object per user (as stored, hash included), so
+its output can be imported again. Records are streamed from the
+storage: no User object is built.
+"""
+from multiprocessing import Pool
+from typing import Iterator
+import argparse
+import csv
+import json
+from models.hashers import make_password
+from models.storage import storage
+from models.user import User
+
+FIELDS = ('id', 'created_at', 'updated_at', 'email', '_password',
+          'first_name', 'last_name')
+
+
+def read_records(file_path: str, fmt: str = None) -> Iterator[dict]:
+    """ Yield the records of an NDJSON or CSV file, one at a time
+    """
+    if fmt is None:
+        fmt = 'csv' if file_path.endswith('.csv') else 'ndjson'
+    with open(file_path, 'r', newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield {k: v for k, v in row.items() if v != ''}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batches(records: Iterator[dict], size: int) -> Iterator[list]:
+    """ Group records in lists of `size`
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_users(file_path: str, fmt: str = None, batch_size: int = 10000,
+                 processes: int = None) -> (int, int):
+    """ Import users from a file.
+    Return: (number imported, number skipped)
+    """
+    User.load_from_file()
+    imported = skipped = 0
+    with Pool(processes) as pool:
+        for batch in batches(read_records(file_path, fmt), batch_size):
+            # earlier batches are in the email index already
+            seen = set()
+            records = []
+            for record in batch:
+                email = record.get('email')
+                if not email or not isinstance(email, str) \
+                        or not isinstance(record.get('password', ''), str) \
+                        or email in seen or User.search({'email': email}):
+                    skipped += 1
+                    continue
+                seen.add(email)
+                records.append(record)
+
+            clear = [r['password'] for r in records if 'password' in r]
+            hashed = iter(pool.map(make_password, clear,
+                                   chunksize=max(len(clear) // 64, 1)))
+            users = []
+            for record in records:
+                fields = {k: record.get(k) for k in FIELDS if k in record}
+                if 'password' in record:
+                    fields['_password'] = next(hashed)
+                users.append(User(**fields))
+            imported += User.save_many(users, persist=False)
+    User.persist()
+    return imported, skipped
+
+
+def export_users(file_path: str) -> int:
+    """ Write every stored user as one JSON line, reading the storage
+    twice: first to find the last record of each ID (a log can save or
+    remove an ID several times), then to write those records.
+    Return: the number of users exported
+    """
+    last = {}
+    for i, (user_id, _) in enumerate(storage.load(User)):
+        last[user_id] = i
+    count = 0
+    with open(file_path, 'w') as f:
+        for i, (user_id, user_json) in enumerate(storage.load(User)):
+            if user_json is None or last.get(user_id) != i:
+                continue
+            f.write(json.dumps(user_json))
+            f.write("\n")
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import/export users")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=("ndjson", "csv"),
+                        help="input format (default: from the extension)")
+    parser.add_argument("--batch", type=int, default=10000,
+                        help="users added to DATA at a time")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="password hashing processes (default: CPUs)")
+    args = parser.parse_args()
+    if args.command == "import":
+        imported, skipped = import_users(args.file, args.format, args.batch,
+                                         args.processes)
+        print("{} users imported, {} skipped".format(imported, skipped))
+    else:
+        print("{} users exported".format(export_users(args.file)))
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+""" Environment configuration module
+"""
+from os import getenv
+
+
+def env_int(name: str, default: int) -> int:
+    """ Read an integer environment variable, default if it is unset or
+    isn't an integer
+    """
+    try:
+        return int(getenv(name, default))
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """ Read a float environment variable, default if it is unset or
+    isn't a number
+    """
+    try:
+        return float(getenv(name, default))
+    except ValueError:
+        return default
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+""" Password hashers module
+
+Hashes are stored as "<algorithm>$<parameters>$...", except the legacy
+unsalted SHA-256 hex digests, which have no prefix. New passwords are
+hashed with PASSWORD_HASHER (default: pbkdf2_sha256); a hash made with
+another algorithm or other cost parameters is upgraded on the next
+successful login. Cost parameters:
+  - PBKDF2_ITERATIONS (default 100000)
+  - SCRYPT_N, SCRYPT_R, SCRYPT_P (default 16384, 8, 1)
+  - BCRYPT_ROUNDS (default 12), if the bcrypt package is installed
+"""
+from os import getenv
+import hashlib
+import hmac
+import os
+from models.env import env_int
+try:
+    import bcrypt
+except ImportError:
+    bcrypt = None
+
+
+class SHA256Hasher():
+    """ Legacy unsalted SHA-256 hex digest
+    """
+    name = "sha256"
+
+    def encode(self, pwd: str) -> str:
+        """ Hash a password
+        """
+        return hashlib.sha256(pwd.encode()).hexdigest().lower()
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check a password against a hash, in constant time
+        """
+        return hmac.compare_digest(self.encode(pwd), encoded.lower())
+
+    def needs_update(self, encoded: str) -> bool:
+        """ True if the hash was made with other cost parameters
+        """
+        return False
+
+
+class PBKDF2Hasher():
+    """ PBKDF2-HMAC-SHA256 with a random salt
+    """
+    name = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = None):
+        """ Initialize the hasher with its cost
+        """
+        if iterations is None:
+            iterations = env_int('PBKDF2_ITERATIONS', 100000)
+        self.iterations = iterations
+
+    def encode(self, pwd: str, salt: bytes = None,
+               iterations: int = None) -> str:
+        """ Hash a password
+        """
+        salt = salt if salt is not None else os.urandom(16)
+        iterations = iterations or self.iterations
+        digest = hashlib.pbkdf2_hmac('sha256', pwd.encode(), salt,
+                                     iterations)
+        return "{}${}${}${}".format(self.name, iterations, salt.hex(),
+                                    digest.hex())
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check a password against a hash, in constant time
+        """
+        try:
+            _, iterations, salt, _ = encoded.split('$')
+            expected = self.encode(pwd, bytes.fromhex(salt), int(iterations))
+        except ValueError:
+            return False
+        return hmac.compare_digest(expected, encoded)
+
+    def needs_update(self, encoded: str) -> bool:
+        """ True if the hash was made with other cost parameters
+        """
+        return encoded.split('$')[1] != str(self.iterations)
+
+
+class ScryptHasher():
+    """ scrypt with a random salt
+    """
+    name = "scrypt"
+
+    def __init__(self, n: int = None, r: int = None, p: int = None):
+        """ Initialize the hasher with its cost
+        """
+        self.n = n or env_int('SCRYPT_N', 16384)
+        self.r = r or env_int('SCRYPT_R', 8)
+        self.p = p or env_int('SCRYPT_P', 1)
+
+    def encode(self, pwd: str, salt: bytes = None, n: int = None,
+               r: int = None, p: int = None) -> str:
+        """ Hash a password
+        """
+        salt = salt if salt is not None else os.urandom(16)
+        n, r, p = n or self.n, r or self.r, p or self.p
+        digest = hashlib.scrypt(pwd.encode(), salt=salt, n=n, r=r, p=p,
+                                maxmem=256 * n * r * p)
+        return "{}${}${}${}${}${}".format(self.name, n, r, p, salt.hex(),
+                                          digest.hex())
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check a password against a hash, in constant time
+        """
+        try:
+            _, n, r, p, salt, _ = encoded.split('$')
+            expected = self.encode(pwd, bytes.fromhex(salt),
+                                   int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(expected, encoded)
+
+    def needs_update(self, encoded: str) -> bool:
+        """ True if the hash was made with other cost parameters
+        """
+        return encoded.split('$')[1:4] != [str(self.n), str(self.r),
+                                           str(self.p)]
+
+
+class BcryptHasher():
+    """ bcrypt (requires the bcrypt package)
+    """
+    name = "bcrypt"
+
+    def __init__(self, rounds: int = None):
+        """ Initialize the hasher with its cost
+        """
+        self.rounds = rounds or env_int('BCRYPT_ROUNDS', 12)
+
+    def encode(self, pwd: str) -> str:
+        """ Hash a password
+        """
+        hashed = bcrypt.hashpw(pwd.encode(), bcrypt.gensalt(self.rounds))
+        return "{}${}".format(self.name, hashed.decode())
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check a password against a hash (bcrypt compares in
+        constant time)
+        """
+        try:
+            return bcrypt.checkpw(pwd.encode(),
+                                  encoded[len(self.name) + 1:].encode())
+        except ValueError:
+            return False
+
+    def needs_update(self, encoded: str) -> bool:
+        """ True if the hash was made with other cost parameters
+        """
+        # bcrypt$$2b$12$...
+        return encoded.split('$')[3] != "{:02d}".format(self.rounds)
+
+
+HASHERS = {}
+
+
+def register(hasher):
+    """ Add a hasher to the registry
+    """
+    HASHERS[hasher.name] = hasher
+
+
+register(SHA256Hasher())
+register(PBKDF2Hasher())
+register(ScryptHasher())
+if bcrypt is not None:
+    register(BcryptHasher())
+
+
+def default_hasher():
+    """ Hasher used for new passwords
+    """
+    name = getenv('PASSWORD_HASHER', PBKDF2Hasher.name)
+    return HASHERS.get(name, HASHERS[PBKDF2Hasher.name])
+
+
+def identify(encoded: str):
+    """ Hasher that made a stored hash, or None if unknown
+    """
+    if '$' not in encoded:
+        return HASHERS[SHA256Hasher.name]
+    return HASHERS.get(encoded.split('$', 1)[0])
+
+
+def make_password(pwd: str) -> str:
+    """ Hash a password with the default hasher
+    """
+    return default_hasher().encode(pwd)
+
+
+def check_password(pwd: str, encoded: str) -> (bool, bool):
+    """ Check a password against a stored hash.
+    Return: (valid, needs_update) - needs_update is True when the hash
+    should be replaced by one from the default hasher
+    """
+    hasher = identify(encoded)
+    if hasher is None or not hasher.verify(pwd, encoded):
+        return (False, False)
+    default = default_hasher()
+    if hasher is not default:
+        return (True, True)
+    return (True, hasher.needs_update(encoded))
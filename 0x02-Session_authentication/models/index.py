@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" Index module
+"""
+from typing import List
+
+
+class Index():
+    """ Secondary hash index on one attribute of a Base subclass:
+    maps each value of the attribute to the IDs of the objects having it
+    """
+
+    def __init__(self, attribute: str, unique: bool = False):
+        """ Initialize an empty index
+        """
+        self.attribute = attribute
+        self.unique = unique
+        self.__by_value = {}
+        self.__by_id = {}
+
+    def clear(self):
+        """ Drop every entry
+        """
+        self.__by_value = {}
+        self.__by_id = {}
+
+    def check(self, obj_id: str, value):
+        """ Raise a ValueError if obj_id can't take value without
+        breaking a unique constraint. An object keeping a value it
+        already has passes: files written before the constraint can
+        hold duplicates, which stay loadable and savable
+        """
+        if not self.unique or value is None:
+            return
+        try:
+            owners = self.__by_value.get(value, {})
+        except TypeError:
+            return
+        if obj_id in owners:
+            return
+        if len(owners) > 0:
+            raise ValueError("{} {} already exists"
+                             .format(self.attribute, value))
+
+    def add(self, obj_id: str, value):
+        """ Index obj_id under value
+        """
+        self.discard(obj_id)
+        try:
+            self.__by_value.setdefault(value, {})[obj_id] = True
+        except TypeError:
+            return
+        self.__by_id[obj_id] = value
+
+    def discard(self, obj_id: str):
+        """ Remove obj_id from the index, if present
+        """
+        if obj_id not in self.__by_id:
+            return
+        value = self.__by_id.pop(obj_id)
+        owners = self.__by_value.get(value)
+        if owners is None:
+            return
+        owners.pop(obj_id, None)
+        if len(owners) == 0:
+            del self.__by_value[value]
+
+    def lookup(self, value) -> List[str]:
+        """ Return the IDs indexed under value, or None if value can't
+        be hashed (the caller must scan instead)
+        """
+        try:
+            return list(self.__by_value.get(value, {}))
+        except TypeError:
+            return None
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+""" Lazy object map module
+"""
+from typing import Iterator, Tuple, TypeVar
+
+
+class Record():
+    """ Raw JSON dictionary of an object not built yet
+    """
+    __slots__ = ('json',)
+
+    def __init__(self, obj_json: dict):
+        """ Wrap a JSON dictionary
+        """
+        self.json = obj_json
+
+
+class LazyDict(dict):
+    """ Map of ID => object whose values may still be raw records.
+
+    A record is turned into an object of `cls` the first time it is
+    read through [], get(), pop(), values() or items(); records() reads
+    the JSON dictionaries without building anything.
+    """
+
+    def __init__(self, cls):
+        """ Initialize an empty map of objects of cls
+        """
+        super().__init__()
+        self.cls = cls
+
+    def put_record(self, obj_id: str, obj_json: dict):
+        """ Store the raw JSON dictionary of an object
+        """
+        dict.__setitem__(self, obj_id, Record(obj_json))
+
+    def __hydrate(self, obj_id: str, value) -> TypeVar('Base'):
+        """ Build the object of a record and keep it in place
+        """
+        if type(value) is not Record:
+            return value
+        obj = self.cls(**value.json)
+        dict.__setitem__(self, obj_id, obj)
+        return obj
+
+    def __getitem__(self, obj_id: str) -> TypeVar('Base'):
+        """ Object of an ID
+        """
+        return self.__hydrate(obj_id, dict.__getitem__(self, obj_id))
+
+    def get(self, obj_id: str, default=None) -> TypeVar('Base'):
+        """ Object of an ID, or default
+        """
+        value = dict.get(self, obj_id, default)
+        if value is default:
+            return default
+        return self.__hydrate(obj_id, value)
+
+    def pop(self, obj_id: str, *default) -> TypeVar('Base'):
+        """ Remove an ID and return its object
+        """
+        value = dict.pop(self, obj_id, *default)
+        if type(value) is Record:
+            return self.cls(**value.json)
+        return value
+
+    def values(self) -> Iterator[TypeVar('Base')]:
+        """ Every object
+        """
+        for obj_id in list(self.keys()):
+            obj = self.get(obj_id)
+            if obj is not None:
+                yield obj
+
+    def items(self) -> Iterator[Tuple[str, TypeVar('Base')]]:
+        """ Every (ID, object)
+        """
+        for obj_id in list(self.keys()):
+            obj = self.get(obj_id)
+            if obj is not None:
+                yield obj_id, obj
+
+    def records(self) -> Iterator[Tuple[str, dict]]:
+        """ Every (ID, JSON dictionary), building no object. The IDs
+        are read right away, the JSON dictionaries as they are iterated
+        """
+        return ((obj_id, value.json if type(value) is Record
+                 else value.to_json(True))
+                for obj_id, value in list(dict.items(self)))
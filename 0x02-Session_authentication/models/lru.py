@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+""" LRU cache module
+"""
+from collections import OrderedDict
+import threading
+
+
+class LRUCache():
+    """ Mapping of at most `size` entries: adding one more evicts the
+    least recently used
+    """
+
+    def __init__(self, size: int):
+        """ Initialize an empty cache
+        """
+        self.size = size
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ Value of key (now the most recently used), or default
+        """
+        with self.__lock:
+            value = self.__entries.get(key, default)
+            if value is not default:
+                self.__entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """ Set the value of key, evicting the least recently used entry
+        if the cache is full
+        """
+        if self.size <= 0:
+            return
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            if len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+
+    def discard(self, key):
+        """ Drop key, if present
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self):
+        """ Drop every entry
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def discard_if(self, predicate):
+        """ Drop every entry whose key matches predicate
+        """
+        with self.__lock:
+            for key in [key for key in self.__entries if predicate(key)]:
+                del self.__entries[key]
+
+    def __len__(self) -> int:
+        """ Number of entries
+        """
+        return len(self.__entries)
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+""" Storage module
+
+Storage engines persist the objects of a Base subclass. The engine is
+selected with the STORAGE_TYPE environment variable:
+  - file (default): every save/remove rewrites `.db_<Class>.json`
+  - wal: every save/remove appends one record to `.db_<Class>.log`,
+    which is compacted into `.db_<Class>.json` in the background once
+    it grows past WAL_COMPACT_SIZE bytes
+  - group: saves and removes only mark the class dirty; a background
+    thread rewrites `.db_<Class>.json` at most once per
+    GROUP_COMMIT_INTERVAL seconds, or as soon as GROUP_COMMIT_BATCH_SIZE
+    changes are pending. Pending changes are written at exit.
+
+With STORAGE_DURABLE=1, snapshots are written to a temporary file,
+synced to disk and renamed over the old one.
+"""
+from os import getenv, path
+from time import monotonic
+from typing import Iterator, Tuple, TypeVar
+import atexit
+import json
+import logging
+import os
+import threading
+from models.env import env_float, env_int
+
+DURABLE = getenv("STORAGE_DURABLE", "0") == "1"
+
+
+def file_path(cls) -> str:
+    """ Path of the JSON snapshot of a class
+    """
+    return ".db_{}.json".format(cls.__name__)
+
+
+def signature(*paths: str) -> tuple:
+    """ Cheap fingerprint of files: changes whenever one of them does
+    """
+    result = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            result.append(None)
+            continue
+        result.append((st.st_ino, st.st_size, st.st_mtime_ns))
+    return tuple(result)
+
+
+def iter_json_object(f, chunk_size: int = 65536) -> Iterator[tuple]:
+    """ Yield the (key, value) pairs of the JSON object in file f as
+    they are parsed, reading it chunk_size characters at a time: only
+    one value is held at once, never the whole document
+    """
+    decoder = json.JSONDecoder()
+    state = {'buf': '', 'pos': 0, 'eof': False}
+
+    def fill() -> bool:
+        """ Read one more chunk, return False at the end of the file """
+        if state['eof']:
+            return False
+        chunk = f.read(chunk_size)
+        state['buf'] = state['buf'][state['pos']:] + chunk
+        state['pos'] = 0
+        state['eof'] = chunk == ''
+        return not state['eof']
+
+    def peek() -> str:
+        """ Next non-blank character, '' at the end of the file """
+        while True:
+            buf, pos = state['buf'], state['pos']
+            while pos < len(buf) and buf[pos] in ' \t\n\r':
+                pos += 1
+            state['pos'] = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return ''
+
+    def decode():
+        """ Next JSON value; a value is complete only once followed by a
+        delimiter, otherwise it is parsed again with more input (a
+        number cut by a chunk boundary, like 1 | .5, parses too) """
+        while True:
+            try:
+                value, end = decoder.raw_decode(state['buf'], state['pos'])
+            except ValueError:
+                if fill():
+                    continue
+                raise
+            buf = state['buf']
+            if (end == len(buf) or buf[end] not in ' \t\n\r,:]}') \
+                    and fill():
+                continue
+            state['pos'] = end
+            return value
+
+    def expect(char: str):
+        """ Consume char """
+        if peek() != char:
+            raise ValueError("expected {!r} at {}".format(
+                char, getattr(f, "name", "JSON input")))
+        state['pos'] += 1
+
+    if peek() == '':
+        return
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = decode()
+        expect(':')
+        peek()
+        yield key, decode()
+        if peek() == '}':
+            return
+        expect(',')
+        peek()
+
+
+def write_snapshot(cls, objs_json: dict, durable: bool = False,
+                   atomic: bool = False) -> int:
+    """ Write the JSON snapshot of a class. With atomic, write it to a
+    temporary file renamed over the snapshot: a failed write leaves the
+    old one whole. durable also syncs the new file to disk before the
+    rename, so a crash leaves either the old or the new one, whole.
+    Return: the size of the snapshot in bytes
+    """
+    target = file_path(cls)
+    if not durable and not atomic:
+        with open(target, 'w') as f:
+            json.dump(objs_json, f)
+            return f.tell()
+    tmp_path = target + ".tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(objs_json, f)
+            size = f.tell()
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        if path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+def append_lines(file_path: str, data: bytes) -> int:
+    """ Append newline-terminated lines to a file. If the file doesn't
+    end with a newline (a crash cut its last line), the cut line is
+    terminated first, so it stays a single unreadable line.
+    Return: the size of the file
+    """
+    with open(file_path, 'ab+') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                data = b'\n' + data
+        f.write(data)
+        return f.tell()
+
+
+def read_snapshot(cls) -> Iterator[Tuple[str, dict]]:
+    """ Yield (id, JSON dictionary) for each object of the snapshot,
+    parsed incrementally
+    """
+    if not path.exists(file_path(cls)):
+        return
+    with open(file_path(cls), 'r') as f:
+        yield from iter_json_object(f)
+
+
+class FileStorage():
+    """ Rewrite the whole snapshot on every mutation
+    """
+    deferred = False
+
+    def __init__(self, durable: bool = DURABLE):
+        """ Initialize the engine
+        """
+        self.durable = durable
+
+    def load(self, cls) -> Iterator[Tuple[str, dict]]:
+        """ Yield (id, JSON dictionary) for each stored object
+        """
+        return read_snapshot(cls)
+
+    def signature(self, cls) -> tuple:
+        """ Fingerprint of the stored objects of a class
+        """
+        return signature(file_path(cls))
+
+    def save(self, obj: TypeVar('Base')):
+        """ Persist a saved object
+        """
+        obj.__class__.save_to_file(self.durable)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Persist a removed object
+        """
+        obj.__class__.save_to_file(self.durable)
+
+    def remove_many(self, cls, objs: list):
+        """ Persist several removed objects
+        """
+        cls.save_to_file(self.durable)
+
+    def save_all(self, cls):
+        """ Persist every in-memory object of a class
+        """
+        cls.save_to_file(self.durable)
+
+    def flush(self, cls=None, durable: bool = False):
+        """ Nothing is pending: every mutation is already written. With
+        durable, sync the snapshot of cls to disk
+        """
+        if not durable or cls is None or not path.exists(file_path(cls)):
+            return
+        with open(file_path(cls), 'a') as f:
+            os.fsync(f.fileno())
+
+
+class WALStorage():
+    """ Append-only log of saves and removes on top of the snapshot
+
+    Records are JSON lines: {"op": "save", "id": ..., "obj": {...}}
+    or {"op": "remove", "id": ...}. A load replays the snapshot, then
+    the log being compacted (if a compaction was interrupted), then
+    the live log. Replaying a record twice is harmless, so a crash at
+    any point of a compaction loses nothing.
+    """
+    deferred = False
+
+    def __init__(self, compact_size: int = None):
+        """ Initialize the engine
+        """
+        if compact_size is None:
+            compact_size = env_int('WAL_COMPACT_SIZE', 4194304)
+        self.compact_size = compact_size
+        self.__locks = {}
+        self.__compacting = set()
+        self.__guard = threading.Lock()
+        self.__compacted = threading.Condition(self.__guard)
+
+    @staticmethod
+    def log_path(cls) -> str:
+        """ Path of the live log of a class
+        """
+        return ".db_{}.log".format(cls.__name__)
+
+    @staticmethod
+    def compacting_path(cls) -> str:
+        """ Path of the log being folded into the snapshot
+        """
+        return ".db_{}.log.compacting".format(cls.__name__)
+
+    def __lock(self, cls) -> threading.Lock:
+        """ Lock serializing appends and log rotation of a class
+        """
+        with self.__guard:
+            return self.__locks.setdefault(cls.__name__, threading.Lock())
+
+    def load(self, cls) -> Iterator[Tuple[str, dict]]:
+        """ Yield (id, JSON dictionary or None if removed) in replay order
+        """
+        yield from read_snapshot(cls)
+        for log in (self.compacting_path(cls), self.log_path(cls)):
+            if not path.exists(log):
+                continue
+            with open(log, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # record cut by a crash (terminated by the
+                        # next append)
+                        continue
+                    yield record.get('id'), record.get('obj')
+
+    def signature(self, cls) -> tuple:
+        """ Fingerprint of the stored objects of a class
+        """
+        return signature(file_path(cls), self.compacting_path(cls),
+                         self.log_path(cls))
+
+    def __append(self, cls, *records: dict):
+        """ Append records to the log and compact if it grew too big
+        """
+        data = "".join(json.dumps(record) + "\n" for record in records)
+        with self.__lock(cls):
+            size = append_lines(self.log_path(cls), data.encode())
+        if size >= self.compact_size:
+            self.compact(cls, background=True)
+
+    def save(self, obj: TypeVar('Base')):
+        """ Append a save record
+        """
+        self.__append(obj.__class__, {"op": "save", "id": obj.id,
+                                      "obj": obj.to_json(True)})
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Append a remove record
+        """
+        self.__append(obj.__class__, {"op": "remove", "id": obj.id})
+
+    def remove_many(self, cls, objs: list):
+        """ Append remove records in a single write
+        """
+        self.__append(cls, *[{"op": "remove", "id": obj.id} for obj in objs])
+
+    def save_all(self, cls):
+        """ Persist every in-memory object of a class as a new snapshot,
+        once the compaction running in the background (if any) is done:
+        it may have read the objects before they were added
+        """
+        self.compact(cls, wait=True)
+
+    def flush(self, cls=None, durable: bool = False):
+        """ Records are appended as they come: with durable, sync the
+        log of cls to disk
+        """
+        if not durable or cls is None:
+            return
+        with self.__lock(cls):
+            if path.exists(self.log_path(cls)):
+                with open(self.log_path(cls), 'a') as f:
+                    os.fsync(f.fileno())
+
+    def compact(self, cls, background: bool = False, wait: bool = False):
+        """ Fold the log into a new snapshot of the in-memory objects.
+        Nothing is done if a compaction of the class is running, unless
+        wait: then compact again once it is done
+        """
+        with self.__guard:
+            while cls.__name__ in self.__compacting:
+                if not wait:
+                    return
+                self.__compacted.wait()
+            self.__compacting.add(cls.__name__)
+        if background:
+            threading.Thread(target=self.__compact, args=(cls,),
+                             daemon=True).start()
+        else:
+            self.__compact(cls)
+
+    def __compact(self, cls):
+        """ Rotate the log, write the snapshot, drop the rotated log
+        """
+        try:
+            with self.__lock(cls):
+                if not path.exists(self.log_path(cls)):
+                    pass
+                elif path.exists(self.compacting_path(cls)):
+                    # a previous compaction was interrupted: its records
+                    # are replayed after the snapshot, keep them ordered
+                    with open(self.log_path(cls), 'rb') as src:
+                        append_lines(self.compacting_path(cls), src.read())
+                    os.remove(self.log_path(cls))
+                else:
+                    os.replace(self.log_path(cls), self.compacting_path(cls))
+                records = cls.records()
+            write_snapshot(cls, dict(records), durable=True)
+            if path.exists(self.compacting_path(cls)):
+                os.remove(self.compacting_path(cls))
+        finally:
+            with self.__guard:
+                self.__compacting.discard(cls.__name__)
+                self.__compacted.notify_all()
+
+
+class GroupCommitStorage():
+    """ Debounced snapshots: a mutation only marks its class dirty, and
+    a background thread rewrites the snapshot of a dirty class once
+    `interval` seconds have passed since its first pending change, or
+    as soon as `batch_size` changes are pending. A burst of N saves
+    costs one rewrite instead of N, and none on the request path.
+
+    Changes not flushed yet are lost if the process dies; flush()
+    writes them right away.
+
+    Saves never wait for a write in progress: signature() doesn't take
+    the write lock, and the snapshots written by this engine keep the
+    signature the class had before (only other processes change it).
+
+    Snapshots are written to a temporary file renamed over the old one.
+    A write failing in the flusher is logged and tried again after
+    `interval`; flush() raises it.
+    """
+    deferred = True
+
+    def __init__(self, interval: float = None, batch_size: int = None,
+                 durable: bool = DURABLE):
+        """ Initialize the engine
+        """
+        if interval is None:
+            interval = env_float('GROUP_COMMIT_INTERVAL', 0.1)
+        if batch_size is None:
+            batch_size = env_int('GROUP_COMMIT_BATCH_SIZE', 1000)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.durable = durable
+        # class name => [class, pending changes, time of the first one]
+        self.__pending = {}
+        self.__locks = {}
+        # class name => signature reported while it is being written
+        self.__writing = {}
+        # class name => (file signature after our last write, signature
+        # reported for it)
+        self.__written = {}
+        self.__guard = threading.Lock()
+        self.__wakeup = threading.Condition(self.__guard)
+        self.__flusher = None
+        atexit.register(self.flush)
+
+    def __lock(self, cls) -> threading.RLock:
+        """ Lock held while the snapshot of a class is written
+        """
+        with self.__guard:
+            return self.__locks.setdefault(cls.__name__, threading.RLock())
+
+    def load(self, cls) -> Iterator[Tuple[str, dict]]:
+        """ Yield (id, JSON dictionary) for each stored object, once the
+        pending changes of the class are written (as FileStorage would
+        have: they aren't lost by a reload)
+        """
+        self.flush(cls)
+        return self.__read(cls)
+
+    def __read(self, cls) -> Iterator[Tuple[str, dict]]:
+        """ read_snapshot, never in the middle of a write of this process
+        """
+        with self.__lock(cls):
+            yield from read_snapshot(cls)
+
+    def signature(self, cls) -> tuple:
+        """ Fingerprint of the stored objects of a class, unchanged by
+        the writes of this process
+        """
+        with self.__guard:
+            if cls.__name__ in self.__writing:
+                return self.__writing[cls.__name__]
+            written = self.__written.get(cls.__name__)
+        current = signature(file_path(cls))
+        if written is not None and written[0] == current:
+            return written[1]
+        return current
+
+    def __mark(self, cls, changes: int = 1):
+        """ Record pending changes of cls and wake the flusher up
+        """
+        with self.__guard:
+            pending = self.__pending.get(cls.__name__)
+            if pending is None:
+                pending = [cls, 0, monotonic()]
+                self.__pending[cls.__name__] = pending
+            pending[1] += changes
+            if self.__flusher is None:
+                self.__flusher = threading.Thread(target=self.__run,
+                                                  daemon=True)
+                self.__flusher.start()
+            if pending[1] == changes or pending[1] >= self.batch_size:
+                self.__wakeup.notify()
+
+    def save(self, obj: TypeVar('Base')):
+        """ Mark the class of a saved object dirty
+        """
+        self.__mark(obj.__class__)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Mark the class of a removed object dirty
+        """
+        self.__mark(obj.__class__)
+
+    def remove_many(self, cls, objs: list):
+        """ Mark the class of several removed objects dirty
+        """
+        self.__mark(cls, len(objs))
+
+    def save_all(self, cls):
+        """ Persist every in-memory object of a class right away
+        """
+        with self.__guard:
+            self.__pending.pop(cls.__name__, None)
+        self.__write(cls, self.durable)
+
+    def flush(self, cls=None, durable: bool = False):
+        """ Write the pending changes of cls (of every class if None)
+        now; with durable, sync the snapshot to disk even if nothing
+        was pending
+        """
+        with self.__guard:
+            if cls is None:
+                classes = [pending[0] for pending in self.__pending.values()]
+                self.__pending.clear()
+            else:
+                pending = self.__pending.pop(cls.__name__, None)
+                classes = [cls] if pending is not None or durable else []
+        for klass in classes:
+            self.__write(klass, durable or self.durable)
+
+    def __write(self, cls, durable: bool):
+        """ Write the snapshot of cls
+        """
+        name = cls.__name__
+        with self.__lock(cls):
+            before = self.signature(cls)
+            with self.__guard:
+                self.__writing[name] = before
+            try:
+                cls.save_to_file(durable, atomic=True)
+            finally:
+                current = signature(file_path(cls))
+                with self.__guard:
+                    self.__written[name] = (current, before)
+                    del self.__writing[name]
+
+    def __due(self) -> Tuple[list, float]:
+        """ Pop the classes to write now.
+        Return: (classes, seconds until the next one is due or None)
+        """
+        now = monotonic()
+        due = []
+        timeout = None
+        for name, (cls, changes, since) in list(self.__pending.items()):
+            left = since + self.interval - now
+            if changes >= self.batch_size or left <= 0:
+                del self.__pending[name]
+                due.append(cls)
+            elif timeout is None or left < timeout:
+                timeout = left
+        return due, timeout
+
+    def __run(self):
+        """ Flusher thread: write dirty classes as they become due
+        """
+        try:
+            while True:
+                with self.__guard:
+                    due, timeout = self.__due()
+                    while not due:
+                        self.__wakeup.wait(timeout)
+                        due, timeout = self.__due()
+                for cls in due:
+                    try:
+                        self.__write(cls, self.durable)
+                    except Exception:
+                        logging.getLogger(__name__).exception(
+                            "Can't write the snapshot of %s, retrying in "
+                            "%ss", cls.__name__, self.interval)
+                        # keep the changes pending
+                        self.__mark(cls)
+        finally:
+            # the next mark starts a new flusher
+            with self.__guard:
+                self.__flusher = None
+
+
+STORAGE_TYPE = getenv("STORAGE_TYPE", "file")
+if STORAGE_TYPE == "wal":
+    storage = WALStorage()
+elif STORAGE_TYPE == "group":
+    storage = GroupCommitStorage()
+else:
+    storage = FileStorage()
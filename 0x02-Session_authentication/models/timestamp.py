@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+""" Timestamp codec module
+
+Base timestamps are stored in files as "YYYY-MM-DDTHH:MM:SS". Parsing
+that with strptime on load and formatting it with strftime on every
+to_json() dominates loads and listings, so a Timestamp attribute parses
+canonical strings with fromisoformat, keeps the string it was loaded
+from for to_json(), and keeps the string form of a datetime once it has
+been formatted.
+"""
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def is_canonical(text) -> bool:
+    """ True if text is exactly what strftime(TIMESTAMP_FORMAT) returns
+    for the datetime it stands for, so it can be reused as is
+    """
+    return (type(text) is str and len(text) == 19 and text.isascii()
+            and text[4] == '-' and text[7] == '-' and text[10] == 'T'
+            and text[13] == ':' and text[16] == ':' and text[0] != '0'
+            and text[0:4].isdigit() and text[5:7].isdigit()
+            and text[8:10].isdigit() and text[11:13].isdigit()
+            and text[14:16].isdigit() and text[17:19].isdigit())
+
+
+def decode(text: str) -> datetime:
+    """ Parse a timestamp string like strptime(TIMESTAMP_FORMAT) does
+    """
+    if is_canonical(text):
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass
+    # Same result and same errors as before for everything else
+    return datetime.strptime(text, TIMESTAMP_FORMAT)
+
+
+def encode(value: datetime) -> str:
+    """ Format a datetime like strftime(TIMESTAMP_FORMAT) does
+    """
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+class Timestamp():
+    """ Datetime attribute of a slotted class, backed by two slots:
+    `_<name>` (the datetime) and `_<name>_text` (its string form, once
+    known)
+    """
+
+    def __set_name__(self, owner, name: str):
+        """ Bind the attribute to the slots of its class
+        """
+        self.name = name
+        self.value_slot = '_' + name
+        self.text_slot = '_' + name + '_text'
+        self.value = owner.__dict__[self.value_slot]
+        self.text = owner.__dict__[self.text_slot]
+
+    def __get__(self, obj, owner=None):
+        """ The datetime
+        """
+        if obj is None:
+            return self
+        try:
+            return self.value.__get__(obj)
+        except AttributeError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        """ Set the datetime, dropping the former string form
+        """
+        self.value.__set__(obj, value)
+        self.text.__set__(obj, None)
+
+    def __delete__(self, obj):
+        """ Unset the attribute
+        """
+        self.__get__(obj)
+        self.value.__delete__(obj)
+        self.text.__set__(obj, None)
+
+    def load(self, obj, text: str):
+        """ Set the attribute of a new object from its string form,
+        kept for dump() if it is a valid canonical timestamp (parsed
+        with fromisoformat, which is cheap); invalid strings raise, as
+        strptime did
+        """
+        if is_canonical(text):
+            try:
+                value = datetime.fromisoformat(text)
+            except ValueError:
+                pass
+            else:
+                self.value.__set__(obj, value)
+                self.text.__set__(obj, text)
+                return
+        self.__set__(obj, decode(text))
+
+    def dump(self, obj):
+        """ String form of the attribute for to_json(), formatted once;
+        values that aren't datetimes are returned as they are
+        """
+        text = self.text.__get__(obj)
+        if text is not None:
+            return text
+        value = self.value.__get__(obj)
+        if type(value) is not datetime:
+            return value
+        text = encode(value)
+        self.text.__set__(obj, text)
+        return text
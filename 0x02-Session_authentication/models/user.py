@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 """ User module
 """
-import hashlib
 from models.base import Base
+from models.hashers import check_password, make_password
 
 
 class User(Base):
     """ User class
     """
+    __slots__ = ('email', '_password', 'first_name', 'last_name')
+    indexes = {'email': True}
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
@@ -26,22 +28,34 @@ class User(Base):
 
     @password.setter
     def password(self, pwd: str):
-        """ Setter of a new password: encrypt in SHA256
+        """ Setter of a new password: hash it with the default hasher
+        (see models.hashers)
         """
         if pwd is None or type(pwd) is not str:
             self._password = None
         else:
-            self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+            self._password = make_password(pwd)
 
     def is_valid_password(self, pwd: str) -> bool:
-        """ Validate a password
+        """ Validate a password, upgrading its hash to the default
+        hasher and cost on success if it was made differently
         """
         if pwd is None or type(pwd) is not str:
             return False
         if self.password is None:
             return False
-        pwd_e = pwd.encode()
-        return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
+        valid, needs_update = check_password(pwd, self.password)
+        if valid and needs_update and User.get(self.id) is self:
+            old_password, old_updated_at = self._password, self.updated_at
+            self.password = pwd
+            try:
+                self.save()
+            except (OSError, ValueError):
+                # Storage or unique index error: keep the old hash, the
+                # upgrade is tried again on the next login
+                self._password = old_password
+                self.updated_at = old_updated_at
+        return valid
 
     def display_name(self) -> str:
         """ Display User name based on email/first_name/last_name
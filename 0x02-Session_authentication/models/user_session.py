@@ -5,6 +5,8 @@ from models.base import Base
 
 class UserSession(Base):
     """ UserSession class to store session details in a database """
+    __slots__ = ('user_id', 'session_id')
+    indexes = {'session_id': True, 'user_id': False}
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a UserSession instance """
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" Tests of the base module
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from models.user import User
+
+
+class TestUniqueIndex(unittest.TestCase):
+    """ Unique email index over a file written before it existed """
+
+    def setUp(self):
+        """ Load two users sharing an email from an empty directory """
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.first = User(email="dup@x")
+        self.second = User(email="dup@x")
+        with open(".db_User.json", "w") as f:
+            json.dump({self.first.id: self.first.to_json(True),
+                       self.second.id: self.second.to_json(True)}, f)
+        User.load_from_file()
+
+    def tearDown(self):
+        """ Forget the users and remove the directory """
+        os.remove(".db_User.json")
+        User.load_from_file()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_duplicates_stay_savable(self):
+        """ Users loaded with the same email can still be updated """
+        for user in (User.get(self.first.id), User.get(self.second.id)):
+            user.first_name = "Bob"
+            user.save()
+        User.save_many([User.get(self.first.id), User.get(self.second.id)])
+        self.assertEqual(len(User.search({'email': "dup@x"})), 2)
+
+    def test_no_new_duplicate(self):
+        """ No other user can take the shared email """
+        with self.assertRaises(ValueError):
+            User(email="dup@x").save()
+        other = User(email="other@x")
+        other.save()
+        other.email = "dup@x"
+        with self.assertRaises(ValueError):
+            other.save()
+        with self.assertRaises(ValueError):
+            User.save_many([User(email="new@x"), User(email="new@x")])
+
+
+if __name__ == "__main__":
+    unittest.main()
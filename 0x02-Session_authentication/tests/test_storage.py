@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+""" Tests of the storage module
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from models.storage import WALStorage, iter_json_object
+from models.user import User
+
+DOCUMENTS = [
+    '{}',
+    ' { } ',
+    '{"a": 1.5, "b": 3}',
+    '{"a":-12.25e+3,"b":0,"c":1E2,"d":-0.0}',
+    '{"a": true, "b": false, "c": null}',
+    '{"a": "1.5", "b": "with \\"quotes\\", commas: and } braces"}',
+    '{"a": "\\u00e9t\\u00e9 \\ud83d\\ude00", "b": "café"}',
+    '{"a": [1, 2.5, [3, {"x": 4}]], "b": {"c": {"d": [], "e": {}}}}',
+    '{\n  "id1": {"email": "bob@hbtn.io", "n": 123456789},\n'
+    '  "id2": {"email": null, "n": 98765.4321}\n}\n',
+]
+
+
+def parse(document: str, chunk_size: int) -> list:
+    """ Every (key, value) parsed from document """
+    return list(iter_json_object(io.StringIO(document), chunk_size))
+
+
+class TestIterJsonObject(unittest.TestCase):
+    """ iter_json_object() """
+
+    def test_same_as_json_loads(self):
+        """ Every chunk size gives the pairs of json.loads """
+        for document in DOCUMENTS:
+            expected = list(json.loads(document).items())
+            for chunk_size in list(range(1, 9)) + [16, 65536]:
+                with self.subTest(document=document, chunk_size=chunk_size):
+                    self.assertEqual(parse(document, chunk_size), expected)
+
+    def test_number_cut_by_chunk_boundary(self):
+        """ Numbers split anywhere between two chunks are read whole """
+        document = '{"a": 1.5, "b": 3, "c": -2e-3, "d": 10}'
+        for chunk_size in range(1, len(document) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(parse(document, chunk_size),
+                                 [('a', 1.5), ('b', 3), ('c', -0.002),
+                                  ('d', 10)])
+
+    def test_empty_file(self):
+        """ An empty file holds no pair """
+        self.assertEqual(parse('', 1), [])
+        self.assertEqual(parse('  \n', 1), [])
+
+    def test_invalid_documents(self):
+        """ Truncated or malformed documents raise ValueError """
+        for document in ('[1, 2]', '{"a": 1', '{"a": 1,}', '{"a" 1}',
+                         '{"a": 1 "b": 2}', '{"a": 1.5.5}', '{"a": tru}'):
+            for chunk_size in (1, 2, 3, 65536):
+                with self.subTest(document=document, chunk_size=chunk_size):
+                    with self.assertRaises(ValueError):
+                        parse(document, chunk_size)
+
+    def test_reads_one_value_at_a_time(self):
+        """ The pairs are yielded before the end of the file is read """
+        f = io.StringIO('{"a": 1, "b": ' + '[0, ' * 1000 + '0' +
+                        ']' * 1000 + '}')
+        pairs = iter_json_object(f, 4)
+        self.assertEqual(next(pairs), ('a', 1))
+        self.assertLess(f.tell(), 100)
+
+
+class TestWALStorage(unittest.TestCase):
+    """ WALStorage, in a temporary directory """
+
+    def setUp(self):
+        """ Work in an empty directory """
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.storage = WALStorage(compact_size=1 << 30)
+
+    def tearDown(self):
+        """ Remove the directory """
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def stored(self) -> dict:
+        """ id => email of the objects replayed from the storage """
+        result = {}
+        for obj_id, obj_json in self.storage.load(User):
+            if obj_json is None:
+                result.pop(obj_id, None)
+            else:
+                result[obj_id] = obj_json['email']
+        return result
+
+    def test_append_after_torn_record(self):
+        """ A record cut by a crash doesn't swallow the next one """
+        first, second, third = (User(email=email)
+                                for email in ("a@x", "b@x", "c@x"))
+        self.storage.save(first)
+        self.storage.save(second)
+        log = self.storage.log_path(User)
+        with open(log, 'rb+') as f:
+            f.truncate(os.path.getsize(log) - 20)
+        self.assertEqual(self.stored(), {first.id: "a@x"})
+
+        WALStorage().save(third)
+        self.assertEqual(self.stored(), {first.id: "a@x", third.id: "c@x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
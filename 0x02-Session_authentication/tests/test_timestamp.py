@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+""" Tests of the timestamp module
+"""
+from datetime import datetime
+import unittest
+from models.timestamp import TIMESTAMP_FORMAT, is_canonical
+from models.user import User
+
+VALID = "2024-03-05T12:34:56"
+
+
+def baseline(text: str) -> str:
+    """ created_at of to_json() as strptime/strftime give it """
+    return datetime.strptime(text, TIMESTAMP_FORMAT) \
+        .strftime(TIMESTAMP_FORMAT)
+
+
+class TestTimestamp(unittest.TestCase):
+    """ Timestamp attributes of Base """
+
+    def test_is_canonical(self):
+        """ Only digits are accepted in the numeric fields """
+        self.assertTrue(is_canonical(VALID))
+        for text in ("2024-03- 5T12:34:56", " 999-01-01T00:00:00",
+                     "0999-01-01T00:00:00", "2024-03-05T12:3a:56",
+                     "2024-03-05T12:34:5٥", "2024-03-05 12:34:56",
+                     "2024-03-05T12:34:56Z", None):
+            with self.subTest(text=text):
+                self.assertFalse(is_canonical(text))
+
+    def test_same_as_strptime(self):
+        """ Every one-character change of a valid timestamp is loaded
+        and dumped like strptime/strftime, or rejected like strptime """
+        for i in range(len(VALID)):
+            for char in "0123456789 -T:+a":
+                text = VALID[:i] + char + VALID[i + 1:]
+                with self.subTest(text=text):
+                    try:
+                        expected = baseline(text)
+                    except ValueError:
+                        with self.assertRaises(ValueError):
+                            User(email="a@b.c", created_at=text)
+                        continue
+                    user = User(email="a@b.c", created_at=text)
+                    self.assertEqual(user.to_json()["created_at"], expected)
+                    self.assertEqual(user.created_at.strftime(
+                        TIMESTAMP_FORMAT), expected)
+
+    def test_parsed_once(self):
+        """ A loaded timestamp holds its datetime and its string """
+        user = User(email="a@b.c", created_at=VALID)
+        self.assertEqual(user._created_at, datetime(2024, 3, 5, 12, 34, 56))
+        self.assertEqual(user._created_at_text, VALID)
+
+    def test_out_of_range_fields(self):
+        """ Canonical-looking but invalid dates raise on load """
+        for text in ("2024-02-30T00:00:00", "2024-13-01T00:00:00",
+                     "2024-03-05T24:00:00", "2024-03-05T12:34:60"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    User(email="a@b.c", created_at=text)
+
+
+if __name__ == "__main__":
+    unittest.main()
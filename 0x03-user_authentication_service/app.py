@@ -2,19 +2,61 @@
 """
 Flask app
 """
-from flask import Flask, jsonify, request, abort, make_response, redirect
-from auth import Auth
+from flask import (Flask, Response, jsonify, request, abort, make_response,
+                   redirect, g)
+from time import perf_counter
+from auth import Auth, HashingBusy
+from metrics import REQUEST_SECONDS, render
 
 app = Flask(__name__)
 AUTH = Auth()
 
 
+@app.before_request
+def start_timer() -> None:
+    """Remember when the request started"""
+    g.request_start = perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Record the latency of the request under its route"""
+    start = g.get("request_start")
+    if start is not None:
+        rule = request.url_rule
+        REQUEST_SECONDS.observe(perf_counter() - start, request.method,
+                                rule.rule if rule else "unmatched",
+                                str(response.status_code))
+    return response
+
+
+@app.teardown_appcontext
+def end_request(exception) -> None:
+    """Release the per-request database session"""
+    AUTH.end_request()
+
+
+@app.errorhandler(HashingBusy)
+def hashing_busy(error) -> str:
+    """Shed load when the password hashing pool is saturated"""
+    response = jsonify({"message": "service busy, retry later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @app.route("/", methods=["GET"])
 def hello() -> str:
     """Return json respomse"""
     return jsonify({"message": "Bienvenue"})
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics() -> str:
+    """Request, auth stage and database metrics (Prometheus format)"""
+    return Response(render(),
+                    content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.route("/users", methods=["POST"])
 def register_user() -> str:
     """
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+ASGI app: asyncio variant of app.py serving the same endpoints with
+byte-identical responses. Run it with any ASGI server, e.g.
+    uvicorn async_app:app --port 5000
+"""
+import asyncio
+import json
+from http.cookies import CookieError, SimpleCookie
+from time import perf_counter
+from urllib.parse import parse_qs
+from werkzeug.exceptions import (BadRequest, HTTPException, Forbidden,
+                                 InternalServerError, MethodNotAllowed,
+                                 NotFound, Unauthorized)
+from werkzeug.utils import redirect
+from werkzeug.wrappers import Response
+from async_auth import AsyncAuth
+from auth import HashingBusy
+from metrics import REQUEST_SECONDS, render
+
+AUTH = AsyncAuth()
+_ready = None
+
+
+def jsonify(obj) -> Response:
+    """Serialize obj exactly like flask.jsonify does"""
+    body = json.dumps(obj, separators=(",", ":"), sort_keys=True) + "\n"
+    return Response(body, mimetype="application/json")
+
+
+class Request:
+    """Minimal request: method, path, form and cookies"""
+
+    def __init__(self, scope: dict, body: bytes) -> None:
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.form = {}
+        content_type = ""
+        cookie_header = ""
+        for name, value in scope.get("headers", []):
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+            elif name == b"cookie":
+                cookie_header = value.decode("latin-1")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            fields = parse_qs(body.decode("utf-8"), keep_blank_values=True)
+            self.form = {key: values[0] for key, values in fields.items()}
+        cookies = SimpleCookie()
+        cookies.load(cookie_header)
+        self.cookies = {key: morsel.value for key, morsel in cookies.items()}
+
+
+async def hello(request: Request) -> Response:
+    """Return json respomse"""
+    return jsonify({"message": "Bienvenue"})
+
+
+async def register_user(request: Request) -> Response:
+    """
+    Endpoint to register a user.
+    Expects email and password in form data.
+    """
+    email = request.form.get("email")
+    password = request.form.get("password")
+
+    try:
+        user = await AUTH.register_user(email, password)
+        return jsonify({"email": user.email, "message": "user created"})
+    except ValueError:
+        response = jsonify({"message": "email already registered"})
+        response.status_code = 400
+        return response
+
+
+async def login(request: Request) -> Response:
+    """Handles user login."""
+    email = request.form.get("email")
+    password = request.form.get("password")
+
+    if not await AUTH.valid_login(email, password):
+        raise Unauthorized()
+
+    session_id = await AUTH.create_session(email)
+    response = jsonify({"email": email, "message": "logged in"})
+    response.set_cookie("session_id", session_id)
+    return response
+
+
+async def logout(request: Request) -> Response:
+    """ Handles users logout. """
+    session_id = request.cookies.get("session_id")
+
+    if session_id is None:
+        raise Forbidden()
+
+    user = await AUTH.get_user_from_session_id(session_id)
+    if user is None:
+        raise Forbidden()
+
+    await AUTH.destroy_session(user.id)
+    return redirect("/")
+
+
+async def profile(request: Request) -> Response:
+    """Responds to the GET /profile route."""
+    session_id = request.cookies.get("session_id")
+
+    if session_id is None:
+        raise Forbidden()
+
+    user = await AUTH.get_user_from_session_id(session_id)
+    if user is None:
+        raise Forbidden()
+
+    return jsonify({"email": user.email})
+
+
+async def get_reset_password_token(request: Request) -> Response:
+    """
+    Handle POST /reset_password route
+    """
+    email = request.form.get("email")
+    try:
+        reset_token = await AUTH.get_reset_password_token(email)
+    except ValueError:
+        raise Forbidden()
+
+    return jsonify({"email": f"{email}", "reset_token": f"{reset_token}"})
+
+
+async def update_password(request: Request) -> Response:
+    """
+    Handle the PUT /reset_password route to update the user's password.
+    """
+    email = request.form.get("email")
+    reset_token = request.form.get("reset_token")
+    new_password = request.form.get("new_password")
+
+    try:
+        await AUTH.update_password(reset_token, new_password)
+    except ValueError:
+        raise Forbidden()
+
+    return jsonify({"email": f"{email}", "message": "Password updated"})
+
+
+async def metrics(request: Request) -> Response:
+    """Request, auth stage and database metrics (Prometheus format)"""
+    return Response(render(),
+                    content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+ROUTES = {
+    "/": {"GET": hello},
+    "/metrics": {"GET": metrics},
+    "/users": {"POST": register_user},
+    "/sessions": {"POST": login, "DELETE": logout},
+    "/profile": {"GET": profile},
+    "/reset_password": {"POST": get_reset_password_token,
+                        "PUT": update_password},
+}
+
+
+def allowed_methods(methods: dict) -> list:
+    """Methods of a route, with the HEAD and OPTIONS Flask adds"""
+    allowed = list(methods)
+    if "GET" in methods:
+        allowed.append("HEAD")
+    return allowed + ["OPTIONS"]
+
+
+async def dispatch(request: Request) -> Response:
+    """Route a request and turn errors into responses like Flask"""
+    methods = ROUTES.get(request.path)
+    try:
+        if methods is None:
+            raise NotFound()
+        if request.method == "OPTIONS":
+            # Flask's automatic OPTIONS response
+            response = Response("", mimetype="text/html")
+            response.allow.update(allowed_methods(methods))
+            return response
+        method = "GET" if request.method == "HEAD" else request.method
+        handler = methods.get(method)
+        if handler is None:
+            raise MethodNotAllowed(valid_methods=allowed_methods(methods))
+        return await handler(request)
+    except HTTPException as e:
+        return e.get_response()
+    except HashingBusy:
+        response = jsonify({"message": "service busy, retry later"})
+        response.headers["Retry-After"] = "1"
+        response.status_code = 503
+        return response
+    except Exception:
+        return InternalServerError().get_response()
+
+
+async def ensure_ready() -> None:
+    """Create the schema once, before the first request is served"""
+    global _ready
+    if _ready is None:
+        _ready = asyncio.ensure_future(AUTH.init())
+    await _ready
+
+
+async def app(scope: dict, receive, send) -> None:
+    """ASGI entry point"""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await ensure_ready()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await AUTH.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    await ensure_ready()
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    start = perf_counter()
+    try:
+        request = Request(scope, body)
+    except (UnicodeDecodeError, CookieError):
+        # form that isn't UTF-8, or a cookie name SimpleCookie rejects
+        response = BadRequest().get_response()
+    else:
+        response = await dispatch(request)
+    REQUEST_SECONDS.observe(perf_counter() - start, scope["method"],
+                            scope["path"] if scope["path"] in ROUTES
+                            else "unmatched",
+                            str(response.status_code))
+    await send({
+        "type": "http.response.start",
+        "status": response.status_code,
+        "headers": [(name.lower().encode("latin-1"),
+                     value.encode("latin-1"))
+                    for name, value in response.headers.items()],
+    })
+    body = b"" if scope["method"] == "HEAD" else response.get_data()
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Async Auth module: Auth on top of AsyncDB, with bcrypt offloaded to a
+thread pool through run_in_executor
+"""
+import asyncio
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from async_db import AsyncDB
+from auth import (BCRYPT_ROUNDS, HASH_WORKERS, HashingBusy, _bcrypt_hash,
+                  _generate_uuid)
+from db import _env_int
+from metrics import STAGE_SECONDS
+from user import User
+from sqlalchemy.orm.exc import NoResultFound
+
+
+class AsyncAuth:
+    """Auth class to interact with the authentication database."""
+
+    def __init__(self):
+        self._db = AsyncDB()
+        self._executor = ThreadPoolExecutor(HASH_WORKERS,
+                                            thread_name_prefix="bcrypt")
+        self._max_pending = HASH_WORKERS + max(
+            _env_int("HASH_QUEUE_SIZE", 4 * HASH_WORKERS), 0)
+        self._pending = 0
+
+    async def init(self) -> None:
+        """Create the database schema"""
+        await self._db.init()
+
+    async def close(self) -> None:
+        """Release the database connections"""
+        await self._db.close()
+
+    async def _run(self, fn, *args):
+        """
+        Run fn(*args) on the hashing threads.
+        Raises:
+            HashingBusy: If every worker and queue slot is taken.
+        """
+        if self._pending >= self._max_pending:
+            raise HashingBusy
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def _hash_password(self, password: str) -> bytes:
+        """Hash a password with a salt using bcrypt"""
+        start = perf_counter()
+        try:
+            return await self._run(_bcrypt_hash, password.encode("utf-8"),
+                                   BCRYPT_ROUNDS)
+        finally:
+            STAGE_SECONDS.observe(perf_counter() - start, "password_hash")
+
+    async def register_user(self, email: str, password: str) -> User:
+        """Registers a new user after checking if they already exist."""
+        try:
+            await self._db.find_user_by(email=email)
+            raise ValueError
+        except NoResultFound:
+            hashed_password = await self._hash_password(password)
+            return await self._db.add_user(email, hashed_password)
+
+    async def valid_login(self, email: str, password: str) -> bool:
+        """
+        Validates a user's login credentials.
+        """
+        start = perf_counter()
+        try:
+            user = await self._db.find_user_by(email=email)
+        except NoResultFound:
+            return False
+        finally:
+            now = perf_counter()
+            STAGE_SECONDS.observe(now - start, "user_lookup")
+
+        pswd = password.encode("utf-8")
+        try:
+            return await self._run(bcrypt.checkpw, pswd,
+                                   user.hashed_password)
+        finally:
+            STAGE_SECONDS.observe(perf_counter() - now, "password_check")
+
+    async def create_session(self, email: str) -> str:
+        """Creates a session for the user and stores its ID."""
+        session_id = _generate_uuid()
+        if await self._db.update_user_by({"email": email},
+                                         session_id=session_id) == 0:
+            return None
+        return session_id
+
+    async def get_user_from_session_id(self, session_id: str):
+        """
+        Returns the user corresponding to the given session_id.
+        """
+        if session_id is None:
+            return None
+
+        start = perf_counter()
+        try:
+            return await self._db.find_user_by(session_id=session_id)
+        except NoResultFound:
+            return None
+        finally:
+            STAGE_SECONDS.observe(perf_counter() - start, "session_lookup")
+
+    async def destroy_session(self, user_id: int) -> None:
+        """
+        Updates the session ID of the user with the given user_id to None.
+        """
+        if await self._db.update_user_by({"id": user_id},
+                                         session_id=None) == 0:
+            raise NoResultFound
+
+    async def get_reset_password_token(self, email: str) -> str:
+        """
+        Generates a reset password token for a user.
+        """
+        reset_token = _generate_uuid()
+        if await self._db.update_user_by({"email": email},
+                                         reset_token=reset_token) == 0:
+            raise ValueError
+        return reset_token
+
+    async def update_password(self, reset_token: str, password: str) -> None:
+        """
+        Update the user's password using the reset token.
+        """
+        if reset_token is None:
+            raise ValueError()
+
+        try:
+            await self._db.find_user_by(reset_token=reset_token)
+        except NoResultFound:
+            raise ValueError()
+
+        hashed = await self._hash_password(password)
+        if await self._db.update_user_by({"reset_token": reset_token},
+                                         hashed_password=hashed,
+                                         reset_token=None) == 0:
+            raise ValueError()
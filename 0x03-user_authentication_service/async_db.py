@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+""" Async DB module
+"""
+from os import getenv
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import (AsyncEngine, async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.orm.exc import NoResultFound
+from user import Base, User
+from db import USER_COLUMNS, instrument_engine, upgrade_schema
+
+
+class AsyncDB:
+    """Async counterpart of DB, on an aiosqlite engine"""
+
+    def __init__(self, url: str = None, persistent: bool = None) -> None:
+        """
+        Configure a new AsyncDB instance; call init() before use
+        Args:
+            url (str): database URL, defaults to ASYNC_DB_URL or
+                sqlite+aiosqlite:///a.db
+            persistent (bool): keep existing data instead of recreating
+                the schema, defaults to DB_PERSISTENT=1
+        """
+        if url is None:
+            url = getenv("ASYNC_DB_URL", "sqlite+aiosqlite:///a.db")
+        if persistent is None:
+            persistent = getenv("DB_PERSISTENT", "0") == "1"
+        self._persistent = persistent
+        self._engine: AsyncEngine = create_async_engine(url, echo=False)
+        instrument_engine(self._engine.sync_engine)
+        self._sessionmaker = async_sessionmaker(self._engine,
+                                                expire_on_commit=False)
+
+    async def init(self) -> None:
+        """
+        Create the schema (dropping the old one unless persistent) and
+        bring an existing users table up to date, like DB does
+        """
+        async with self._engine.begin() as conn:
+            if not self._persistent:
+                await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(upgrade_schema)
+
+    async def close(self) -> None:
+        """Close every pooled connection"""
+        await self._engine.dispose()
+
+    async def add_user(self, email: str, hashed_password: bytes) -> User:
+        """
+        Create a new user and save it to the database
+        Args:
+            email (str): user's email address
+            hashed_password (bytes): user hashed password
+        Return: the User object
+        """
+        new_user = User(email=email, hashed_password=hashed_password)
+        async with self._sessionmaker() as session:
+            session.add(new_user)
+            await session.commit()
+        return new_user
+
+    async def find_user_by(self, **kwargs) -> User:
+        """
+        Finds a user in the database based on arbitrary keyword arguments.
+        Raises:
+            NoResultFound: If no user matches the criteria.
+            ValueError: If an invalid column is provided.
+        """
+        for key in kwargs:
+            if key not in USER_COLUMNS:
+                raise ValueError
+        async with self._sessionmaker() as session:
+            result = await session.execute(
+                select(User).filter_by(**kwargs).limit(1))
+            user = result.scalars().first()
+        if user is None:
+            raise NoResultFound
+        return user
+
+    async def update_user_by(self, criteria: dict, **kwargs) -> int:
+        """
+        Update the users matching criteria with a single
+        UPDATE ... WHERE statement (only counted without kwargs).
+        Returns:
+            int: The number of users updated.
+        Raises:
+            ValueError: If an invalid column is provided.
+        """
+        for key in list(criteria) + list(kwargs):
+            if key not in USER_COLUMNS:
+                raise ValueError
+        if not kwargs:
+            async with self._sessionmaker() as session:
+                return await session.scalar(
+                    select(func.count()).select_from(User)
+                    .filter_by(**criteria))
+        async with self._sessionmaker() as session:
+            result = await session.execute(
+                update(User).filter_by(**criteria).values(**kwargs))
+            await session.commit()
+        return result.rowcount
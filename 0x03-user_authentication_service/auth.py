@@ -1,14 +1,80 @@
 #!/usr/bin/env python3
 """
 Auth module to handle password hashing
+
+bcrypt work runs on a pool of HASH_WORKERS workers (HASH_EXECUTOR is
+"thread", the default since bcrypt releases the GIL, or "process").
+At most HASH_QUEUE_SIZE hashes may wait for a worker; past that
+HashingBusy is raised at once instead of queueing the request. The
+bcrypt cost factor is BCRYPT_ROUNDS.
 """
 import bcrypt
-from db import DB
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+from db import DB, _env_int
+from metrics import STAGE_SECONDS
 from user import User
 from sqlalchemy.orm.exc import NoResultFound
 from uuid import uuid4
 
 
+BCRYPT_ROUNDS = _env_int("BCRYPT_ROUNDS", 12)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool can't take more work"""
+
+
+class HashingPool:
+    """Bounded executor for bcrypt hashing and verification"""
+
+    def __init__(self, kind: str, workers: int, queue_size: int) -> None:
+        """Configure the pool; workers are started on first use"""
+        self.kind = kind
+        self.workers = max(workers, 1)
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        """Start the executor of this process"""
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool and wait for its result.
+        Raises:
+            HashingBusy: If every worker and queue slot is taken.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+
+HASH_WORKERS = _env_int("HASH_WORKERS", os.cpu_count() or 1)
+HASHING_POOL = HashingPool(os.getenv("HASH_EXECUTOR", "thread"),
+                           HASH_WORKERS,
+                           max(_env_int("HASH_QUEUE_SIZE", 4 * HASH_WORKERS),
+                               0))
+
+
+def _bcrypt_hash(password: bytes, rounds: int) -> bytes:
+    """Salt and hash a password (runs on the hashing pool)"""
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
 def _hash_password(password: str) -> bytes:
     """
     Hash a password with a salt using bcrypt
@@ -16,12 +82,15 @@ def _hash_password(password: str) -> bytes:
         password (str): The password to hash
     Returns:
         bytes: The salted hash of the password
+    Raises:
+        HashingBusy: If the hashing pool is saturated
     """
-    salt = bcrypt.gensalt()
-
-    # Hash the password with the salt
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password
+    start = perf_counter()
+    try:
+        return HASHING_POOL.run(_bcrypt_hash, password.encode("utf-8"),
+                                BCRYPT_ROUNDS)
+    finally:
+        STAGE_SECONDS.observe(perf_counter() - start, "password_hash")
 
 
 def _generate_uuid() -> str:
@@ -37,6 +106,10 @@ class Auth:
     def __init__(self):
         self._db = DB()
 
+    def end_request(self) -> None:
+        """Release the database session of the current request."""
+        self._db.remove_session()
+
     def register_user(self, email: str, password: str) -> User:
         """Registers a new user after checking if they already exist."""
         try:
@@ -52,26 +125,31 @@ class Auth:
         """
         Validates a user's login credentials.
         """
+        start = perf_counter()
         try:
             user = self._db.find_user_by(email=email)
         except NoResultFound:
             return False
+        finally:
+            now = perf_counter()
+            STAGE_SECONDS.observe(now - start, "user_lookup")
 
         user_password = user.hashed_password
         pswd = password.encode("utf-8")
-        return bcrypt.checkpw(pswd, user_password)
+        try:
+            return HASHING_POOL.run(bcrypt.checkpw, pswd, user_password)
+        finally:
+            STAGE_SECONDS.observe(perf_counter() - now, "password_check")
 
     def create_session(self, email: str) -> str:
         """Creates a session for the user, generates a session ID,
         and stores it in the database.
         """
-        try:
-            user = self._db.find_user_by(email=email)
-        except NoResultFound:
-            return None
-        # generate a new session ID.
+        # generate a new session ID, stored in one UPDATE by email.
         session_id = _generate_uuid()
-        self._db.update_user(user.id, session_id=session_id)
+        if self._db.update_user_by({"email": email},
+                                   session_id=session_id) == 0:
+            return None
         return session_id
 
     def get_user_from_session_id(self, session_id: str):
@@ -81,41 +159,49 @@ class Auth:
         if session_id is None:
             return None
 
+        start = perf_counter()
         try:
             user = self._db.find_user_by(session_id=session_id)
         except NoResultFound:
             return None
+        finally:
+            STAGE_SECONDS.observe(perf_counter() - start, "session_lookup")
         return user
 
     def destroy_session(self, user_id: int) -> None:
         """
         Updates the session ID of the user with the given user_id to None.
         """
-        user = self._db.find_user_by(id=user_id)
-        if user:
-            self._db.update_user(user.id, session_id=None)
+        self._db.update_user(user_id, session_id=None)
 
     def get_reset_password_token(self, email: str) -> str:
         """
         Generates a reset password token for a user.
         """
-        try:
-            user = self._db.find_user_by(email=email)
-        except NoResultFound:
-            raise ValueError
-
         reset_token = _generate_uuid()
-        self._db.update_user(user.id, reset_token=reset_token)
+        if self._db.update_user_by({"email": email},
+                                   reset_token=reset_token) == 0:
+            raise ValueError
         return reset_token
 
     def update_password(self, reset_token: str, password: str) -> None:
         """
         Update the user's password using the reset token.
         """
+        # A missing token would match every user without a pending reset
+        if reset_token is None:
+            raise ValueError()
+
+        # Look the token up first: don't pay a hash for an invalid one
         try:
-            user = self._db.find_user_by(reset_token=reset_token)
+            self._db.find_user_by(reset_token=reset_token)
         except NoResultFound:
             raise ValueError()
 
         hashed = _hash_password(password)
-        self._db.update_user(user.id, hashed_password=hashed, reset_token=None)
+        # The token is checked again by the UPDATE itself, so it can't
+        # be used twice by concurrent requests
+        if self._db.update_user_by({"reset_token": reset_token},
+                                   hashed_password=hashed,
+                                   reset_token=None) == 0:
+            raise ValueError()
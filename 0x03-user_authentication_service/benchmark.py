@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Load test of the user authentication service
+
+Runs the flows of main.py (register, log in, get profile, log out,
+reset password, log in again) for N concurrent virtual users, each on
+its own thread, and reports latency percentiles and throughput per
+endpoint:
+
+    python3 benchmark.py --users 16 --flows 10 --output run.json
+    python3 benchmark.py --url http://localhost:5000 --compare run.json
+
+Without --url, the Flask app is imported and called in-process (its
+database is set up as usual, see DB_URL and DB_PERSISTENT). Results are
+written as JSON with --output; --compare prints the change of each
+endpoint against an earlier result file.
+"""
+import argparse
+import json
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional, Tuple
+
+PASSWD = "b4l0u"
+NEW_PASSWD = "t4rt1fl3tt3"
+
+
+class InProcessClient:
+    """Client calling the Flask app through its test client"""
+
+    def __init__(self, app) -> None:
+        """Create a test client without a cookie jar"""
+        self.client = app.test_client(use_cookies=False)
+
+    def request(self, method: str, path: str, data: dict = None,
+                session_id: str = None) -> Tuple[int, Optional[str], Any]:
+        """
+        Send a request.
+        Returns:
+            The status code, the session_id cookie set (if any) and the
+            JSON body (if any).
+        """
+        headers = {}
+        if session_id is not None:
+            headers["Cookie"] = f"session_id={session_id}"
+        response = self.client.open(path, method=method, data=data,
+                                    headers=headers)
+        cookie = None
+        for header in response.headers.getlist("Set-Cookie"):
+            morsel = SimpleCookie(header).get("session_id")
+            if morsel is not None:
+                cookie = morsel.value
+        return (response.status_code, cookie,
+                response.get_json(silent=True))
+
+
+class HTTPClient:
+    """Client calling a running server with requests"""
+
+    def __init__(self, url: str) -> None:
+        """Open a connection pool to the server"""
+        import requests
+        self.url = url.rstrip("/")
+        self.session = requests.Session()
+
+    def request(self, method: str, path: str, data: dict = None,
+                session_id: str = None) -> Tuple[int, Optional[str], Any]:
+        """
+        Send a request, without following redirects.
+        Returns:
+            The status code, the session_id cookie set (if any) and the
+            JSON body (if any).
+        """
+        cookies = {"session_id": session_id} if session_id else None
+        response = self.session.request(method, self.url + path, data=data,
+                                        cookies=cookies,
+                                        allow_redirects=False)
+        self.session.cookies.clear()
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, response.cookies.get("session_id"), body
+
+
+class Recorder:
+    """Latencies and errors of every endpoint, shared by the users"""
+
+    def __init__(self) -> None:
+        """Start with no sample"""
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def call(self, client, name: str, expected: int, method: str,
+             path: str, **kwargs) -> Tuple[bool, Optional[str], Any]:
+        """
+        Time one request of the endpoint `name`.
+        Returns:
+            Whether it returned the expected status, its cookie and its
+            JSON body.
+        """
+        start = time.perf_counter()
+        try:
+            status, cookie, body = client.request(method, path, **kwargs)
+        except Exception:
+            status, cookie, body = None, None, None
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.latencies.setdefault(name, []).append(elapsed)
+            if status != expected:
+                self.errors[name] = self.errors.get(name, 0) + 1
+        return status == expected, cookie, body
+
+
+def run_flow(client, recorder: Recorder, email: str) -> bool:
+    """
+    Run the flow of main.py once for a new user.
+    Returns:
+        True if every step succeeded; the flow stops at the first error.
+    """
+    call = recorder.call
+    form = {"email": email, "password": PASSWD}
+    ok, _, _ = call(client, "POST /users", 200, "POST", "/users", data=form)
+    if not ok:
+        return False
+    ok, session_id, _ = call(client, "POST /sessions", 200, "POST",
+                             "/sessions", data=form)
+    if not ok or session_id is None:
+        return False
+    ok, _, _ = call(client, "GET /profile", 200, "GET", "/profile",
+                    session_id=session_id)
+    if not ok:
+        return False
+    ok, _, _ = call(client, "DELETE /sessions", 302, "DELETE", "/sessions",
+                    session_id=session_id)
+    if not ok:
+        return False
+    ok, _, body = call(client, "POST /reset_password", 200, "POST",
+                       "/reset_password", data={"email": email})
+    if not ok or not body or "reset_token" not in body:
+        return False
+    form = {"email": email, "reset_token": body["reset_token"],
+            "new_password": NEW_PASSWD}
+    ok, _, _ = call(client, "PUT /reset_password", 200, "PUT",
+                    "/reset_password", data=form)
+    if not ok:
+        return False
+    form = {"email": email, "password": NEW_PASSWD}
+    ok, _, _ = call(client, "POST /sessions", 200, "POST", "/sessions",
+                    data=form)
+    return ok
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> dict:
+    """Statistics of one endpoint, latencies in milliseconds"""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput_rps": round(count / duration, 2) if duration else 0.0,
+        "mean_ms": round(1000 * sum(values) / count, 3) if count else 0.0,
+        "p50_ms": round(1000 * percentile(values, 50), 3),
+        "p95_ms": round(1000 * percentile(values, 95), 3),
+        "p99_ms": round(1000 * percentile(values, 99), 3),
+        "max_ms": round(1000 * values[-1], 3) if count else 0.0,
+    }
+
+
+def run(users: int, flows: int, url: str = None) -> dict:
+    """
+    Run `flows` flows for each of `users` concurrent virtual users.
+    Returns:
+        The results, as written by --output.
+    """
+    if url is None:
+        from app import app
+        target = "in-process"
+
+        def make_client():
+            return InProcessClient(app)
+    else:
+        target = url
+
+        def make_client():
+            return HTTPClient(url)
+
+    recorder = Recorder()
+    prefix = uuid.uuid4().hex[:8]
+
+    def virtual_user(number: int) -> int:
+        client = make_client()
+        completed = 0
+        for i in range(flows):
+            email = f"bench-{prefix}-{number}-{i}@example.com"
+            if run_flow(client, recorder, email):
+                completed += 1
+        return completed
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(users) as executor:
+        completed = sum(executor.map(virtual_user, range(users)))
+    duration = time.perf_counter() - start
+
+    endpoints = {name: summarize(latencies, recorder.errors.get(name, 0),
+                                 duration)
+                 for name, latencies in sorted(recorder.latencies.items())}
+    every = [t for latencies in recorder.latencies.values()
+             for t in latencies]
+    return {
+        "target": target,
+        "started_at": started_at,
+        "users": users,
+        "flows_per_user": flows,
+        "duration_s": round(duration, 3),
+        "flows_completed": completed,
+        "flows_per_s": round(completed / duration, 2),
+        "endpoints": endpoints,
+        "total": summarize(every, sum(recorder.errors.values()), duration),
+    }
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    """Print a table of the results, with changes against a baseline"""
+    print(f"{results['target']}: {results['users']} users x "
+          f"{results['flows_per_user']} flows in {results['duration_s']}s "
+          f"({results['flows_completed']} completed, "
+          f"{results['flows_per_s']} flows/s)")
+    print(f"{'endpoint':<22}{'count':>7}{'errors':>7}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    rows = dict(results["endpoints"], total=results["total"])
+    for name, stats in rows.items():
+        print(f"{name:<22}{stats['count']:>7}{stats['errors']:>7}"
+              f"{stats['throughput_rps']:>9}{stats['p50_ms']:>9}"
+              f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+        if baseline is None:
+            continue
+        if name == "total":
+            before = baseline.get("total")
+        else:
+            before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if before[key]:
+                change = 100 * (stats[key] - before[key]) / before[key]
+                changes.append(f"{key} {change:+.1f}%")
+        print(f"{'':<22}vs baseline: {', '.join(changes)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the service")
+    parser.add_argument("--users", type=int, default=8,
+                        help="concurrent virtual users")
+    parser.add_argument("--flows", type=int, default=5,
+                        help="flows run by each user")
+    parser.add_argument("--url", help="server to test (default: the app "
+                        "in-process)")
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--compare", help="results file to compare with")
+    args = parser.parse_args()
+
+    results = run(args.users, args.flows, args.url)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
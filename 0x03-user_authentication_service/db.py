@@ -1,32 +1,126 @@
 #!/usr/bin/env python3
 """ DB module
 """
-from sqlalchemy import create_engine
+from os import getenv
+from time import perf_counter
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import QueuePool
 from user import Base, User
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import InvalidRequestError
+from metrics import DB_QUERY_SECONDS
+
+# Column names an update may set, read once from the mapped table
+USER_COLUMNS = frozenset(User.__table__.columns.keys())
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable"""
+    try:
+        return int(getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _create_engine(url: str) -> Engine:
+    """
+    Create the engine of a database URL. A file-backed SQLite database
+    gets a QueuePool of DB_POOL_SIZE connections, each in WAL mode with
+    a busy timeout, so several threads and processes can share it.
+    """
+    if not url.startswith("sqlite:///") or url.endswith(":memory:"):
+        return create_engine(url, echo=False)
+
+    pool_size = _env_int("DB_POOL_SIZE", 5)
+    engine = create_engine(url, echo=False, poolclass=QueuePool,
+                           pool_size=pool_size, max_overflow=pool_size,
+                           connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Enable WAL and wait for locks instead of failing at once"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+    return engine
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement run by a (sync) engine in DB_QUERY_SECONDS"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context,
+                    executemany):
+        """Remember when the statement started"""
+        context._query_start = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context,
+                  executemany):
+        """Record the statement duration under its type"""
+        kind = statement.lstrip().split(None, 1)[0].upper()
+        DB_QUERY_SECONDS.observe(perf_counter() - context._query_start,
+                                 kind)
+
+
+def upgrade_schema(bind) -> None:
+    """
+    Create the indexes declared on User (unique email included) that
+    an existing users table, from an older a.db, doesn't have yet.
+    Args:
+        bind: engine or connection of the database.
+    Raises:
+        IntegrityError: If existing rows break a unique index.
+    """
+    for index in User.__table__.indexes:
+        index.create(bind=bind, checkfirst=True)
 
 
 class DB:
     """DB class"""
 
-    def __init__(self) -> None:
-        """Initialize a new DB instance"""
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
+    def __init__(self, url: str = None, persistent: bool = None) -> None:
+        """
+        Initialize a new DB instance
+        Args:
+            url (str): database URL, defaults to DB_URL or sqlite:///a.db
+            persistent (bool): keep existing data instead of recreating
+                the schema, defaults to DB_PERSISTENT=1
+        """
+        if url is None:
+            url = getenv("DB_URL", "sqlite:///a.db")
+        if persistent is None:
+            persistent = getenv("DB_PERSISTENT", "0") == "1"
+        self._engine = _create_engine(url)
+        instrument_engine(self._engine)
+        if not persistent:
+            Base.metadata.drop_all(self._engine)
+        # Only the missing tables and indexes are created
         Base.metadata.create_all(self._engine)
-        self.__session = None
+        self._upgrade_schema()
+        self.__session = scoped_session(sessionmaker(bind=self._engine))
+
+    def _upgrade_schema(self) -> None:
+        """Bring an existing users table up to date (see upgrade_schema)"""
+        upgrade_schema(self._engine)
 
     @property
     def _session(self) -> Session:
-        """Memoized session object"""
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        """Session of the current thread, created on first use"""
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """
+        Close the session of the current thread, rolling back anything
+        left uncommitted. Called at the end of every request.
+        """
+        self.__session.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """
@@ -70,11 +164,31 @@ class DB:
             **kwargs: Arbitrary keyword arguments to update user attributes.
         Raises:
             ValueError: If an invalid attribute is provided.
+            NoResultFound: If no user has this id.
+        """
+        if self.update_user_by({"id": user_id}, **kwargs) == 0:
+            raise NoResultFound
+
+    def update_user_by(self, criteria: dict, **kwargs) -> int:
+        """
+        Update the users matching criteria with a single
+        UPDATE ... WHERE statement, without loading them first.
+        Without kwargs nothing is updated, the users are only counted.
+        Args:
+            criteria (dict): column => value the users must match.
+            **kwargs: column => new value.
+        Returns:
+            int: The number of users updated.
+        Raises:
+            ValueError: If an invalid column is provided.
         """
-        user = self.find_user_by(id=user_id)
-        for key, value in kwargs.items():
-            # Check if the key is a valid attribute of User
-            if not hasattr(user, key):
+        for key in list(criteria) + list(kwargs):
+            # Check if the key is a column of the users table
+            if key not in USER_COLUMNS:
                 raise ValueError
-            setattr(user, key, value)
+        if not kwargs:
+            return self._session.query(User).filter_by(**criteria).count()
+        updated = self._session.query(User).filter_by(**criteria) \
+            .update(kwargs, synchronize_session=False)
         self._session.commit()
+        return updated
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Metrics of the service, served by GET /metrics
+
+Counters and histograms kept in process memory and rendered in the
+Prometheus text format; recording a value is a bisect, a lock and two
+additions (under a microsecond).
+"""
+from bisect import bisect_left
+from typing import List
+import threading
+
+# Upper bounds (seconds) of the default histogram buckets: 10us to 10s
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+           0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+REGISTRY = []
+
+
+def _escape(value) -> str:
+    """Label value as written in the text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _labels(names: tuple, values: tuple, extra: str = None) -> str:
+    """{name="value",...} of a series, or '' without labels"""
+    pairs = ['{}="{}"'.format(name, _escape(value))
+             for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    """Sample value as written in the text format"""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonic total, per combination of label values"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str,
+                 labels: tuple = ()):
+        """Create and register the counter"""
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, *label_values):
+        """Add amount to the series of label_values"""
+        self.lock.acquire()
+        try:
+            self.series[label_values] = \
+                self.series.get(label_values, 0) + amount
+        finally:
+            self.lock.release()
+
+    def samples(self) -> List[str]:
+        """Lines of the series"""
+        with self.lock:
+            series = sorted(self.series.items())
+        return ["{}{} {}".format(self.name, _labels(self.labels, values),
+                                 _number(total))
+                for values, total in series]
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets, per combination
+    of label values
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labels: tuple = (), buckets: tuple = BUCKETS):
+        """Create and register the histogram"""
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *label_values):
+        """Record value in the series of label_values"""
+        i = bisect_left(self.buckets, value)
+        # acquire/release: cheaper than a with statement on this path
+        self.lock.acquire()
+        try:
+            series = self.series.get(label_values)
+            if series is None:
+                # One count per bucket, one for +Inf, then the sum
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self.series[label_values] = series
+            series[i] += 1
+            series[-1] += value
+        finally:
+            self.lock.release()
+
+    def samples(self) -> List[str]:
+        """Lines of the series: cumulative buckets, sum and count"""
+        with self.lock:
+            series = sorted((values, list(counts))
+                            for values, counts in self.series.items())
+        lines = []
+        bounds = [_number(bound) for bound in self.buckets] + ['+Inf']
+        for values, counts in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    self.name,
+                    _labels(self.labels, values, 'le="{}"'.format(bound)),
+                    cumulative))
+            labels = _labels(self.labels, values)
+            lines.append("{}_sum{} {}".format(self.name, labels,
+                                              _number(counts[-1])))
+            lines.append("{}_count{} {}".format(self.name, labels,
+                                                cumulative))
+        return lines
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append("# HELP {} {}".format(metric.name,
+                                           metric.documentation))
+        lines.append("# TYPE {} {}".format(metric.name, metric.type))
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, per route",
+    ("method", "route", "status"))
+STAGE_SECONDS = Histogram(
+    "http_request_stage_seconds",
+    "Time spent in each stage of a request: user and session lookups, "
+    "password hashing and checking",
+    ("stage",))
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Time spent running SQL statements, per statement type (the count "
+    "is the number of queries)",
+    ("statement",))
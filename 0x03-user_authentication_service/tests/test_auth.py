@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Tests of the password reset of Auth and AsyncAuth"""
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from async_auth import AsyncAuth
+from auth import Auth
+
+
+class TestUpdatePassword(unittest.TestCase):
+    """update_password with a missing reset token"""
+
+    def setUp(self) -> None:
+        """Work in an empty directory (a.db is the default database)"""
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+
+    def tearDown(self) -> None:
+        """Remove the directory"""
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_none_token(self) -> None:
+        """A None token matches no user, not every user without one"""
+        auth = Auth()
+        auth.register_user("a@b.c", "pwd")
+        auth.register_user("d@e.f", "pwd")
+        with self.assertRaises(ValueError):
+            auth.update_password(None, "new")
+        self.assertTrue(auth.valid_login("a@b.c", "pwd"))
+        self.assertTrue(auth.valid_login("d@e.f", "pwd"))
+        auth.end_request()
+        auth._db._engine.dispose()
+
+    def test_async_none_token(self) -> None:
+        """AsyncAuth refuses a None token like Auth"""
+        async def reset() -> list:
+            auth = AsyncAuth()
+            await auth.init()
+            try:
+                await auth.register_user("a@b.c", "pwd")
+                with self.assertRaises(ValueError):
+                    await auth.update_password(None, "new")
+                return [await auth.valid_login("a@b.c", "pwd")]
+            finally:
+                await auth.close()
+
+        self.assertEqual(asyncio.run(reset()), [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tests of DB and AsyncDB on an existing database"""
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import NoResultFound
+from async_db import AsyncDB
+from db import DB
+
+# users table as created before email, session_id and reset_token were
+# indexed
+OLD_SCHEMA = ("CREATE TABLE users ("
+              "id INTEGER NOT NULL PRIMARY KEY, "
+              "email VARCHAR(250) NOT NULL, "
+              "hashed_password VARCHAR(250) NOT NULL, "
+              "session_id VARCHAR(250), "
+              "reset_token VARCHAR(250))")
+INDEXES = ["ix_users_email", "ix_users_reset_token", "ix_users_session_id"]
+
+
+class TestUpgradeSchema(unittest.TestCase):
+    """Opening an existing database from before the indexes"""
+
+    def setUp(self) -> None:
+        """Create an old database with two users"""
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "old.db")
+        self.create_old_db([("a@b.c", "sid"), ("d@e.f", None)])
+
+    def tearDown(self) -> None:
+        """Remove the database"""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def create_old_db(self, users: list) -> None:
+        """Write the old schema and users (email, session_id)"""
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(OLD_SCHEMA)
+            conn.executemany("INSERT INTO users (email, hashed_password, "
+                             "session_id) VALUES (?, 'hash', ?)", users)
+        conn.close()
+
+    def indexes(self) -> list:
+        """Names of the indexes of the users table"""
+        conn = sqlite3.connect(self.path)
+        try:
+            return sorted(row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'users' AND sql IS NOT NULL"))
+        finally:
+            conn.close()
+
+    def test_db_creates_missing_indexes(self) -> None:
+        """DB keeps the users and adds the indexes"""
+        self.assertEqual(self.indexes(), [])
+        db = DB("sqlite:///" + self.path, persistent=True)
+        self.assertEqual(self.indexes(), INDEXES)
+        self.assertEqual(db.find_user_by(session_id="sid").email, "a@b.c")
+        with self.assertRaises(IntegrityError):
+            db.add_user("a@b.c", "other")
+        db.remove_session()
+        db._engine.dispose()
+
+    def test_db_upgrade_is_idempotent(self) -> None:
+        """Opening an upgraded database again changes nothing"""
+        DB("sqlite:///" + self.path, persistent=True)._engine.dispose()
+        db = DB("sqlite:///" + self.path, persistent=True)
+        self.assertEqual(self.indexes(), INDEXES)
+        self.assertEqual(db.find_user_by(email="d@e.f").id, 2)
+        db._engine.dispose()
+
+    def test_db_duplicate_emails(self) -> None:
+        """Existing duplicate emails can't get the unique index"""
+        self.tearDown()
+        os.makedirs(self.dir)
+        self.create_old_db([("a@b.c", None), ("a@b.c", None)])
+        with self.assertRaises(IntegrityError):
+            DB("sqlite:///" + self.path, persistent=True)
+
+    def test_async_db_creates_missing_indexes(self) -> None:
+        """AsyncDB.init upgrades the table like DB"""
+        async def upgrade() -> str:
+            db = AsyncDB("sqlite+aiosqlite:///" + self.path, persistent=True)
+            await db.init()
+            try:
+                return (await db.find_user_by(session_id="sid")).email
+            finally:
+                await db.close()
+
+        self.assertEqual(asyncio.run(upgrade()), "a@b.c")
+        self.assertEqual(self.indexes(), INDEXES)
+
+    def test_db_update_without_changes(self) -> None:
+        """Updating no column only counts the users"""
+        db = DB("sqlite:///" + self.path, persistent=True)
+        self.assertEqual(db.update_user_by({"session_id": None}), 1)
+        db.update_user(1)
+        with self.assertRaises(NoResultFound):
+            db.update_user(3)
+        db.remove_session()
+        db._engine.dispose()
+
+    def test_async_db_update_without_changes(self) -> None:
+        """AsyncDB.update_user_by counts the users like DB"""
+        async def update() -> list:
+            db = AsyncDB("sqlite+aiosqlite:///" + self.path, persistent=True)
+            await db.init()
+            try:
+                return [await db.update_user_by({"email": "a@b.c"}),
+                        await db.update_user_by({"id": 3})]
+            finally:
+                await db.close()
+
+        self.assertEqual(asyncio.run(update()), [1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()